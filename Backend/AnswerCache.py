@@ -0,0 +1,206 @@
+import os
+import re
+import time
+import atexit
+import hashlib
+import threading
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+from dotenv import dotenv_values
+from Backend.DecisionCache import CacheKey
+from Backend.PersistentCache import PersistentLRUCache
+from Backend.TextIndex import Stem, StopWords, Tokenize
+
+env_vars = dotenv_values(".env")
+AnswerCacheTTL = float(env_vars.get("AnswerCacheTTL") or 7 * 24 * 3600)
+AnswerCacheSize = int(env_vars.get("AnswerCacheSize") or 1000)
+# Near-duplicate match: trigram Jaccard similarity needed to reuse an answer
+AnswerCacheSimilarity = float(env_vars.get("AnswerCacheSimilarity") or 0.8)
+
+ANSWER_CACHE_DB_PATH = os.path.join("Data", "AnswerCache.db")
+
+# Words that point at something said earlier, or answers that go stale within the day
+ContextReferences = re.compile(
+    r"\b(?:it|its|he|him|his|she|her|they|them|their|this|that|these|those|there|then|"
+    r"i|my|mine|we|us|our|previous|last|above|same|again|more|else|another|also)\b|^(?:and|but|so|or|what about|how about)\b"
+)
+TimeSensitive = re.compile(r"\b(?:today|tonight|now|tomorrow|yesterday|current|currently|latest|date|time|day|week|month|year)\b")
+# A terse query this soon after another exchange is treated as a follow-up
+FollowUpWindow = 120
+
+# Asking words that change what is asked, and ones that do not
+Interrogatives = {"what", "who", "when", "where", "why", "how", "which"}
+FillerWords = {"explain", "describe", "define", "know", "something", "briefly"}
+# Stop words to the shingles, but "is X safe" and "is X not safe" want opposite answers
+Negations = {"not", "no", "never", "nor", "none", "nothing", "nobody", "neither", "without", "cannot"}
+
+SIMHASH_BITS = 64
+BANDS = 8
+BAND_BITS = SIMHASH_BITS // BANDS
+
+
+def Interrogative(text: str) -> str:
+    words = [Stem(word) for word in Tokenize(CacheKey(text), drop_stopwords=False)]
+    return next((word for word in words if word in Interrogatives), "")
+
+
+def Negated(text: str) -> bool:
+    return any(word in Negations or word.endswith("n't") for word in Tokenize(CacheKey(text), drop_stopwords=False))
+
+
+def Shingles(text: str) -> Set[str]:
+    """Character trigrams of the content words run together, so "photo synthesis" matches "photosynthesis"."""
+    words = [Stem(word) for word in Tokenize(CacheKey(text), drop_stopwords=False)]
+    words = [word for word in words if word not in StopWords and word not in FillerWords]
+    if not words:
+        return set()
+    joined = " " + "".join(words) + " "
+    return {joined[index:index + 3] for index in range(len(joined) - 2)}
+
+
+def SimHash(features: Set[str]) -> int:
+    weights = [0] * SIMHASH_BITS
+    for feature in features:
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def Bands(fingerprint: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(band << BAND_BITS) | (fingerprint >> (band * BAND_BITS) & mask) for band in range(BANDS)]
+
+
+def Jaccard(a: Set[str], b: Set[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def IsContextDependent(query: str, recent: Optional[List[Dict]] = None) -> bool:
+    """Whether the answer to query may depend on the conversation or the clock, so must not be cached."""
+    text = CacheKey(query)
+    if ContextReferences.search(text) or TimeSensitive.search(text):
+        return True
+    if recent and len(Tokenize(text, drop_stopwords=False)) <= 2:
+        last = next((message for message in reversed(recent) if message["role"] == "assistant"), None)
+        try:
+            if last and datetime.now() - datetime.fromisoformat(last["timestamp"]) < timedelta(seconds=FollowUpWindow):
+                return True
+        except (KeyError, TypeError, ValueError):
+            pass
+    return False
+
+
+class AnswerCache(PersistentLRUCache):
+    """Persistent LRU cache of general answers with near-duplicate lookup.
+
+    Queries are keyed on their normalized text. A miss on the exact key falls
+    back to a SimHash over character trigrams: the 64-bit fingerprint is split
+    into eight 8-bit bands, so any entry within seven bits shares a band and
+    is found with dictionary lookups. A candidate is accepted only if it asks
+    with the same question word and its trigram Jaccard similarity clears
+    AnswerCacheSimilarity. Storage and LRU order are PersistentLRUCache's.
+    """
+
+    table = "answers"
+    schema = ("key TEXT PRIMARY KEY, query TEXT NOT NULL, answer TEXT NOT NULL, expires REAL NOT NULL, "
+              "last_used REAL NOT NULL")
+    value_columns = ("query", "answer", "expires")
+    counters = ("hits", "near_hits", "misses", "expired", "stale", "evictions")
+
+    def __init__(self, db_path: str = ANSWER_CACHE_DB_PATH, max_entries: int = AnswerCacheSize,
+                 ttl: float = AnswerCacheTTL, similarity: float = AnswerCacheSimilarity):
+        self.ttl = ttl
+        self.similarity = similarity
+        self._bands: Dict[int, Set[str]] = defaultdict(set)
+        super().__init__(db_path, max_entries)
+
+    def _purge_condition(self, now: float):
+        return "expires < ?", (now,)
+
+    def _insert(self, key: str, entry: Dict):
+        entry["shingles"] = Shingles(entry["query"])
+        entry["simhash"] = SimHash(entry["shingles"])
+        entry["interrogative"] = Interrogative(entry["query"])
+        entry["negated"] = Negated(entry["query"])
+        super()._insert(key, entry)
+        for band in Bands(entry["simhash"]):
+            self._bands[band].add(key)
+
+    def _remove(self, key: str) -> Dict:
+        entry = super()._remove(key)
+        for band in Bands(entry["simhash"]):
+            self._bands[band].discard(key)
+            if not self._bands[band]:
+                del self._bands[band]
+        return entry
+
+    def _nearest(self, query: str, shingles: Set[str]) -> Optional[str]:
+        fingerprint = SimHash(shingles)
+        interrogative = Interrogative(query)
+        negated = Negated(query)
+        candidates = set()
+        for band in Bands(fingerprint):
+            candidates.update(self._bands.get(band, ()))
+        best, best_similarity = None, self.similarity
+        for key in candidates:
+            entry = self._entries[key]
+            if interrogative and entry["interrogative"] and entry["interrogative"] != interrogative:
+                continue
+            if entry["negated"] != negated:
+                continue
+            similarity = Jaccard(shingles, entry["shingles"])
+            if similarity >= best_similarity:
+                best, best_similarity = key, similarity
+        return best
+
+    def get(self, query: str, allow_expired: bool = False) -> Optional[str]:
+        """Cached answer to query or a near-duplicate; allow_expired serves stale answers, e.g. during an outage."""
+        key = CacheKey(query)
+        now = time.time()
+        with self._lock:
+            near = False
+            if key not in self._entries:
+                shingles = Shingles(query)
+                key = self._nearest(query, shingles) if shingles else None
+                near = True
+            if key is None:
+                self.misses += 1
+                return None
+
+            entry = self._entries[key]
+            if entry["expires"] < now:
+                # Kept until evicted or replaced, as a last resort when no fresh answer can be had
+                if not allow_expired:
+                    self.expired += 1
+                    self.misses += 1
+                    return None
+                self.stale += 1
+
+            self._touch(key, now)
+            self.hits += 1
+            self.near_hits += near
+            return entry["answer"]
+
+    def put(self, query: str, answer: str):
+        key = CacheKey(query)
+        if not key or not answer.strip():
+            return
+
+        now = time.time()
+        self._store(key, {"query": query, "answer": answer, "expires": now + self.ttl, "last_used": now})
+
+
+_cache: Optional[AnswerCache] = None
+_cache_lock = threading.Lock()
+
+
+def GetAnswerCache() -> AnswerCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnswerCache()
+            atexit.register(_cache.save)
+        return _cache
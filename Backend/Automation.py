@@ -78,6 +78,7 @@ try:
     from Backend.SpeechToText import SpeechRecognition
     from Backend.Chatbot import ChatBot
     from Backend.RealtimeSearchEngine import RealtimeSearchEngine
+    from Backend.ChatLogStore import GetChatLog
     GUI_INTEGRATION_AVAILABLE = True
 except ImportError:
     GUI_INTEGRATION_AVAILABLE = False
@@ -1168,6 +1169,8 @@ Battery: {battery_info.get('battery_percent', 'N/A')}%"""
                 if GUI_INTEGRATION_AVAILABLE:
                     SetAssistantStatus(f"Reminder: {message}")
                     ShowTextToScreen(f"⏰ Reminder: {message}")
+                    # Timer threads write through the same single-writer chat log as the voice thread
+                    GetChatLog().append("assistant", f"Reminder: {message}")
                     self._speak(f"Reminder: {message}")
                     
             timer = threading.Timer(delay_minutes * 60, show_reminder)
@@ -0,0 +1,415 @@
+import os
+import json
+import queue
+import atexit
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+
+DB_PATH = os.path.join("Data", "ChatLog.db")
+# Shipped as Data/Chatlog.json; the name is matched without regard to case
+LEGACY_JSON_PATH = os.path.join("Data", "ChatLog.json")
+
+# Number of recent entries kept in memory for prompt building and the GUI
+RECENT_WINDOW = 100
+# Write-behind batching for the background flusher
+FLUSH_INTERVAL = 0.5
+FLUSH_BATCH_SIZE = 64
+
+
+def _FindIgnoringCase(path: str) -> Optional[str]:
+    """path, or a file in the same directory whose name differs from it only in case; None if neither exists."""
+    if os.path.exists(path):
+        return path
+    directory, name = os.path.split(path)
+    try:
+        names = os.listdir(directory or ".")
+    except OSError:
+        return None
+    match = next((candidate for candidate in sorted(names) if candidate.lower() == name.lower()), None)
+    return os.path.join(directory, match) if match else None
+
+
+class ChatLogStore:
+    """Append-only chat history shared by Main, ChatBot and RealtimeSearchEngine.
+
+    Entries live in a single SQLite table keyed by an autoincrement id, so an
+    append is one INSERT and a tail read is an indexed range scan no matter how
+    long the history grows. The database runs in WAL mode with full sync so a
+    crash never leaves a half-written log behind.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, legacy_path: Optional[str] = LEGACY_JSON_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._init_database()
+
+        if legacy_path:
+            self._import_legacy_json(legacy_path)
+
+    def _init_database(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=FULL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS chat_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session INTEGER NOT NULL DEFAULT 0,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS chat_log_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_chat_log_session ON chat_log (session, id)")
+            self._init_search_index()
+            self._conn.commit()
+
+    def _init_search_index(self):
+        """Full-text index over chat_log kept current by an insert trigger."""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chat_log_fts'"
+        ).fetchone()
+        self._conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS chat_log_fts USING fts5 (
+                content,
+                content='chat_log',
+                content_rowid='id',
+                tokenize='porter unicode61'
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS chat_log_fts_insert AFTER INSERT ON chat_log BEGIN
+                INSERT INTO chat_log_fts (rowid, content) VALUES (new.id, new.content);
+            END
+        ''')
+        if not exists:
+            # Index rows written before the index existed
+            self._conn.execute("INSERT INTO chat_log_fts (chat_log_fts) VALUES ('rebuild')")
+
+    def _get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM chat_log_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: str):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO chat_log_meta (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _import_legacy_json(self, legacy_path: str):
+        """One-off import of the old ChatLog.json so existing history is kept."""
+        with self._lock:
+            if self._get_meta("legacy_imported"):
+                return
+            legacy_path = _FindIgnoringCase(legacy_path)
+            if legacy_path is None:
+                return
+            try:
+                with open(legacy_path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                entries = []
+
+            rows = [
+                (entry["role"], entry["content"], entry.get("timestamp") or datetime.now().isoformat())
+                for entry in entries
+                if isinstance(entry, dict) and "role" in entry and "content" in entry
+            ]
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO chat_log (session, role, content, timestamp) VALUES (0, ?, ?, ?)", rows
+                )
+                self._set_meta("legacy_imported", legacy_path)
+
+    @property
+    def session(self) -> int:
+        with self._lock:
+            return int(self._get_meta("session", "0"))
+
+    def append(self, role: str, content: str, timestamp: Optional[str] = None) -> int:
+        """Append a single entry and return its id."""
+        return self.extend([{"role": role, "content": content, "timestamp": timestamp}])[-1]
+
+    def extend(self, entries: Iterable[Dict]) -> List[int]:
+        """Append several entries in one transaction and return their ids."""
+        ids = []
+        with self._lock, self._conn:
+            session = int(self._get_meta("session", "0"))
+            for entry in entries:
+                cursor = self._conn.execute(
+                    "INSERT INTO chat_log (session, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                    (session, entry["role"], entry["content"], entry.get("timestamp") or datetime.now().isoformat())
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def tail(self, limit: Optional[int] = None, current_session_only: bool = True) -> List[Dict]:
+        """Return the last limit entries (all when None) in chronological order."""
+        query = "SELECT role, content, timestamp FROM chat_log"
+        params: list = []
+        with self._lock:
+            if current_session_only:
+                query += " WHERE session = ?"
+                params.append(int(self._get_meta("session", "0")))
+            query += " ORDER BY id DESC"
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            rows = self._conn.execute(query, params).fetchall()
+
+        return [{"role": role, "content": content, "timestamp": timestamp} for role, content, timestamp in reversed(rows)]
+
+    def messages(self, limit: Optional[int] = None) -> List[Dict]:
+        """Tail of the current session in the role/content shape the LLM APIs expect."""
+        return [{"role": entry["role"], "content": entry["content"]} for entry in self.tail(limit)]
+
+    def search(self, terms: List[str], limit: int = 5, role: Optional[str] = None,
+               since: Optional[str] = None, earlier_sessions_only: bool = False) -> List[Dict]:
+        """Best matching entries across all sessions, ranked by BM25.
+
+        terms are matched as prefixes and all of them must occur; since is an
+        ISO timestamp lower bound, and earlier_sessions_only leaves out the
+        current conversation.
+        """
+        terms = [term.replace('"', "") for term in terms if term.replace('"', "").strip()]
+        if not terms:
+            return []
+
+        query = '''
+            SELECT chat_log.role, chat_log.content, chat_log.timestamp
+            FROM chat_log_fts JOIN chat_log ON chat_log.id = chat_log_fts.rowid
+            WHERE chat_log_fts MATCH ?
+        '''
+        params: list = [" ".join(f'"{term}"*' for term in terms)]
+        if role:
+            query += " AND chat_log.role = ?"
+            params.append(role)
+        if since:
+            query += " AND chat_log.timestamp >= ?"
+            params.append(since)
+        query += " AND chat_log.session < ?" if earlier_sessions_only else ""
+        query += " ORDER BY bm25(chat_log_fts), chat_log.id DESC LIMIT ?"
+
+        with self._lock:
+            if earlier_sessions_only:
+                params.append(int(self._get_meta("session", "0")))
+            params.append(limit)
+            rows = self._conn.execute(query, params).fetchall()
+        return [{"role": role, "content": content, "timestamp": timestamp} for role, content, timestamp in rows]
+
+    def count(self, current_session_only: bool = True) -> int:
+        with self._lock:
+            if current_session_only:
+                row = self._conn.execute(
+                    "SELECT COUNT(*) FROM chat_log WHERE session = ?", (int(self._get_meta("session", "0")),)
+                ).fetchone()
+            else:
+                row = self._conn.execute("SELECT COUNT(*) FROM chat_log").fetchone()
+        return row[0]
+
+    def start_new_session(self) -> int:
+        """Begin an empty conversation window without deleting stored history."""
+        with self._lock, self._conn:
+            session = int(self._get_meta("session", "0")) + 1
+            self._set_meta("session", str(session))
+        return session
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ChatLogService:
+    """Single-writer front end for ChatLogStore.
+
+    Every writer (voice thread, reminder timers, shutdown path) goes through
+    one queue drained by a background thread, which writes entries to the
+    store in batches. The recent window of the current session is mirrored in
+    a bounded ring buffer so prompt building and GUI reads never touch disk.
+    """
+
+    _SESSION = object()
+    _STOP = object()
+
+    def __init__(self, store: ChatLogStore, window: int = RECENT_WINDOW,
+                 flush_interval: float = FLUSH_INTERVAL, batch_size: int = FLUSH_BATCH_SIZE):
+        self.store = store
+        self.window = window
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._recent = deque(store.tail(window), maxlen=window)
+        self._count = store.count()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._listeners: List[Callable[[List[Dict]], None]] = []
+        # Held by the writer from a batch's write until its listeners have seen it
+        self._listeners_lock = threading.Lock()
+        self._closed = False
+
+        self._writer = threading.Thread(target=self._write_loop, name="ChatLogWriter", daemon=True)
+        self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            pending = [self._queue.get()]
+
+            # Gather whatever else arrives within the flush interval into one transaction
+            while len(pending) < self.batch_size and isinstance(pending[-1], dict):
+                try:
+                    pending.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    break
+
+            batch = []
+            for item in pending:
+                if isinstance(item, dict):
+                    batch.append(item)
+                    continue
+
+                self._write_batch(batch)
+                batch = []
+                if item is self._SESSION:
+                    self.store.start_new_session()
+                elif isinstance(item, threading.Event):
+                    item.set()
+                elif item is self._STOP:
+                    return
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: List[Dict]):
+        if not batch:
+            return
+        with self._listeners_lock:
+            try:
+                self.store.extend(batch)
+            except Exception as e:
+                print(f"Error flushing chat log: {e}")
+                return
+
+            # Downstream indexes are fed from the writer thread, off the hot path
+            for listener in list(self._listeners):
+                try:
+                    listener(batch)
+                except Exception as e:
+                    print(f"Error in chat log listener: {e}")
+
+    def add_listener(self, callback: Callable[[List[Dict]], None], backfill: bool = False):
+        """Call callback with every batch of entries after it has been written.
+
+        With backfill, callback is first given the whole stored history, up
+        to the last entry written when it was registered. No batch is
+        written in between, so every entry reaches it exactly once and in
+        order.
+        """
+        with self._listeners_lock:
+            if backfill:
+                callback(self.store.tail(None, current_session_only=False))
+            self._listeners.append(callback)
+
+    def append(self, role: str, content: str, timestamp: Optional[str] = None):
+        """Queue a single entry for writing."""
+        self.extend([{"role": role, "content": content, "timestamp": timestamp}])
+
+    def extend(self, entries: Iterable[Dict]):
+        """Queue entries for writing; they are visible to readers immediately.
+
+        Once the service is closed (at interpreter exit), late writes from
+        threads still winding down are dropped with a message rather than
+        raising into them.
+        """
+        with self._lock:
+            if self._closed:
+                entries = list(entries)
+                print(f"Chat log is closed, dropping {len(entries)} late entr{'y' if len(entries) == 1 else 'ies'}")
+                return
+            for entry in entries:
+                entry = {
+                    "role": entry["role"],
+                    "content": entry["content"],
+                    "timestamp": entry.get("timestamp") or datetime.now().isoformat()
+                }
+                self._recent.append(entry)
+                self._count += 1
+                self._queue.put(entry)
+
+    def tail(self, limit: Optional[int] = None) -> List[Dict]:
+        """Last limit entries of the current session, served from memory when they fit the window."""
+        with self._lock:
+            if limit is not None and limit <= self.window:
+                return [dict(entry) for entry in list(self._recent)[-limit:]] if limit > 0 else []
+            if self._count <= self.window:
+                return [dict(entry) for entry in self._recent]
+
+        # Older entries than the window holds have to come from disk
+        self.flush()
+        return self.store.tail(limit)
+
+    def messages(self, limit: Optional[int] = None) -> List[Dict]:
+        """Recent window in the role/content shape the LLM APIs expect."""
+        with self._lock:
+            recent = list(self._recent)
+        if limit is not None:
+            recent = recent[-limit:] if limit > 0 else []
+        return [{"role": entry["role"], "content": entry["content"]} for entry in recent]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._count
+
+    def search(self, terms: List[str], limit: int = 5, role: Optional[str] = None,
+               since: Optional[str] = None, earlier_sessions_only: bool = False) -> List[Dict]:
+        """Full-text search over the whole history, including writes still queued."""
+        self.flush()
+        return self.store.search(terms, limit=limit, role=role, since=since,
+                                 earlier_sessions_only=earlier_sessions_only)
+
+    def start_new_session(self):
+        """Begin an empty conversation window without deleting stored history."""
+        with self._lock:
+            self._recent.clear()
+            self._count = 0
+            self._queue.put(self._SESSION)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written."""
+        with self._lock:
+            if self._closed:
+                return True
+            done = threading.Event()
+            self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Flush outstanding writes and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)
+        self._writer.join()
+        self.store.close()
+
+
+_service: Optional[ChatLogService] = None
+_service_lock = threading.Lock()
+
+
+def GetChatLog() -> ChatLogService:
+    """Return the process-wide chat log service, opening the store on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ChatLogService(ChatLogStore())
+            atexit.register(_service.close)
+        return _service
@@ -1,16 +1,30 @@
-from groq import Groq
-from json import load, dump
+import time
 import datetime
 from dotenv import dotenv_values
-import os
+from Backend.AnswerCache import GetAnswerCache, IsContextDependent
+from Backend.ChatLogStore import GetChatLog
+from Backend.ContextWindow import ContextBuilder, CountMessageTokens, CountTokens
+from Backend.Memory import GetMemory, MemoryPrompt
+from Backend.LLMGateway import GetGateway
 
 
 env_vars = dotenv_values(".env")
 Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
-GroqAPIKey = env_vars.get("GroqAPIKey")
-
-client = Groq(api_key=GroqAPIKey)
+# llama3-70b-8192 has an 8k window; leave room for the 1024 token completion and estimation error
+ContextTokenBudget = int(env_vars.get("ContextTokenBudget") or 6000)
+ContextVerbatimTurns = int(env_vars.get("ContextVerbatimTurns") or 6)
+MemorySnippets = int(env_vars.get("MemorySnippets") or 3)
+# Longest an answer may take, from the request to the last token, across every model tried
+AnswerTimeout = float(env_vars.get("AnswerTimeout") or 30)
+ChatModel = env_vars.get("ChatModel") or "llama3-70b-8192"
+# Smaller model tried when ChatModel fails or its circuit is open; set it empty to disable
+FallbackChatModel = env_vars.get("FallbackChatModel", "llama3-8b-8192")
+ChatModels = list(dict.fromkeys(model for model in (ChatModel, FallbackChatModel) if model))
+# What FallbackAnswer says when it has nothing better; never saved to the chat log
+Apology = f"Sorry {Username}, I can't reach my language model right now. Please try again in a moment."
+
+gateway = GetGateway()
 
 
 System = f"""Hello, I am {Username}, You are a very accurate and advanced AI chatbot named {Assistantname} which also has real-time up-to-date information from the internet.
@@ -24,16 +38,10 @@ SystemChatBot = [
 ]
 
 
-os.makedirs("Data", exist_ok=True)
-
-
-try:
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
-except FileNotFoundError:
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
-    messages = []
+chat_log = GetChatLog()
+context_builder = ContextBuilder(token_budget=ContextTokenBudget, verbatim_turns=ContextVerbatimTurns)
+memory = GetMemory()
+answer_cache = GetAnswerCache()
 
 
 def RealtimeInformation():
@@ -47,44 +55,133 @@ def AnswerModifier(Answer):
     return '\n'.join(non_empty_lines)
 
 
-def ChatBot(Query):
-    try:
-        with open(r"Data\ChatLog.json", "r") as f:
-            messages = load(f)
-
-        messages.append({"role": "user", "content": Query})
+def GenerateAnswer(Query, cancel=None, on_token=None, model=ChatModel, deadline=None):
+    """Stream a completion for Query without recording it in the chat log.
+
+    on_token, if given, is called with each piece of text as it arrives. If
+    the cancel Event is set while streaming, the stream is closed and the
+    partial answer is returned with cancelled=True. Token counts are local
+    estimates, used for the speculation metrics. deadline is a
+    time.monotonic() value, AnswerTimeout from now by default.
+    """
+    history = chat_log.messages()
+    system_messages = SystemChatBot + [{"role": "system", "content": RealtimeInformation()}]
+
+    # Recall relevant exchanges that are no longer in the recent window
+    snippets = memory.retrieve(
+        Query, k=MemorySnippets,
+        exclude=[message["content"] for message in history if message["role"] == "assistant"]
+    )
+    if snippets:
+        system_messages.append({"role": "system", "content": MemoryPrompt(snippets)})
+
+    full_messages = context_builder.build(system_messages, history, {"role": "user", "content": Query})
+
+    completion = gateway.groq_stream(
+        deadline=deadline if deadline is not None else time.monotonic() + AnswerTimeout,
+        model=model,
+        messages=full_messages,
+        max_tokens=1024,
+        temperature=0.7,
+        top_p=1,
+        stop=None
+    )
+
+    Answer = ""
+    cancelled = False
+    for text in completion:
+        if cancel is not None and cancel.is_set():
+            cancelled = True
+            completion.close()
+            break
+        Answer += text
+        if on_token is not None:
+            on_token(text)
+
+    return {
+        "answer": Answer.replace("</s>", ""),
+        "cancelled": cancelled,
+        "prompt_tokens": CountMessageTokens(full_messages),
+        "completion_tokens": CountTokens(Answer),
+    }
+
+
+def Cacheable(Query):
+    # Judged against the turns before Query, so call it before recording the answer
+    return not IsContextDependent(Query, chat_log.tail(2))
+
+
+def CachedAnswer(Query):
+    """A stored answer to Query or a near-duplicate of it, or None when there is none or it depends on context."""
+    if not Cacheable(Query):
+        return None
+    return answer_cache.get(Query)
+
+
+def RecordAnswer(Query, Answer, cache=True):
+    if cache and Cacheable(Query):
+        answer_cache.put(Query, Answer)
+    chat_log.extend([
+        {"role": "user", "content": Query},
+        {"role": "assistant", "content": Answer}
+    ])
+
+
+def ChatBot(Query, on_token=None):
+    Answer = CachedAnswer(Query)
+    if Answer is not None:
+        if on_token is not None:
+            on_token(Answer)
+        RecordAnswer(Query, Answer, cache=False)
+        return AnswerModifier(Answer)
 
-        full_messages = SystemChatBot + [{"role": "system", "content": RealtimeInformation()}] + messages
+    # One deadline for every model tried, so an outage costs at most AnswerTimeout
+    deadline = time.monotonic() + AnswerTimeout
+    delivered = []
+
+    def forward(text):
+        delivered.append(text)
+        if on_token is not None:
+            on_token(text)
+
+    for model in ChatModels:
+        try:
+            Answer = GenerateAnswer(Query, on_token=forward, model=model, deadline=deadline)["answer"]
+        except Exception as e:
+            print(f"Error from {model}: {e}")
+            # Part of the answer is already out; another model would start it over
+            if delivered or time.monotonic() >= deadline:
+                break
+            continue
+        RecordAnswer(Query, Answer)
+        return AnswerModifier(Answer)
 
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=full_messages,
-            max_tokens=1024,
-            temperature=0.7,
-            top_p=1,
-            stream=True,
-            stop=None
-        )
+    return FallbackAnswer(Query, "".join(delivered), on_token)
 
-        Answer = ""
-        for chunk in completion:
-            if chunk.choices[0].delta.content:
-                Answer += chunk.choices[0].delta.content
 
-        Answer = Answer.replace("</s>", "")
-        messages.append({"role": "assistant", "content": Answer})
+def FallbackAnswer(Query, partial="", on_token=None):
+    """Best answer without the LLM: the partial answer, a stale cached one, or an apology.
 
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump(messages, f, indent=4)
+    Partial and cached answers go into the chat log; the apology does not,
+    so it never becomes context for later questions.
+    """
+    if partial.strip():
+        notice = " ... Sorry, I lost my connection before finishing that answer."
+        if on_token is not None:
+            on_token(notice)
+        RecordAnswer(Query, partial + notice, cache=False)
+        return AnswerModifier(partial + notice)
 
+    Answer = answer_cache.get(Query, allow_expired=True) if Cacheable(Query) else None
+    if Answer is not None:
+        if on_token is not None:
+            on_token(Answer)
+        RecordAnswer(Query, Answer, cache=False)
         return AnswerModifier(Answer)
 
-    except Exception as e:
-        print(f"Error: {e}")
-        
-        with open(r"Data\ChatLog.json", "w") as f:
-            dump([], f, indent=4)
-        return ChatBot(Query)
+    if on_token is not None:
+        on_token(Apology)
+    return Apology
 
 
 if __name__ == "__main__":
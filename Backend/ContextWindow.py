@@ -0,0 +1,112 @@
+import re
+import threading
+from typing import Callable, Dict, List, Optional
+
+# Rough per-message overhead of the chat template (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+
+
+def CountTokens(text: str) -> int:
+    """Estimate the token count of text without calling a tokenizer service.
+
+    BPE tokenizers emit roughly one token per short word or punctuation mark
+    and split long words into ~4 character pieces; this slightly overestimates
+    llama3's tokenizer, which keeps prompts safely inside the budget.
+    """
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text or ""):
+        tokens += max(1, -(-len(piece) // 4))
+    return tokens
+
+
+def CountMessageTokens(messages: List[Dict]) -> int:
+    return sum(CountTokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def ExtractiveSummarizer(previous_summary: str, messages: List[Dict], max_tokens: int) -> str:
+    """Fold messages into previous_summary locally by keeping the lead sentence of each turn."""
+    lines = [line for line in previous_summary.split("\n") if line.strip()]
+    for message in messages:
+        lead = _SENTENCE_PATTERN.split(message["content"].strip(), maxsplit=1)[0]
+        words = lead.split()
+        if len(words) > 30:
+            lead = " ".join(words[:30]) + "..."
+        speaker = "User" if message["role"] == "user" else "Assistant"
+        lines.append(f"- {speaker}: {lead}")
+
+    # Oldest points fall out first once the summary outgrows its share of the budget
+    while lines and CountTokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class ContextBuilder:
+    """Builds chat prompts that stay under a fixed token budget.
+
+    The last verbatim_turns user/assistant turns are sent as-is; everything
+    older is folded into a rolling summary. The summary is cached and only
+    extended with the messages that slid out of the verbatim window since the
+    previous call, so steady-state prompt building does no re-summarizing.
+    """
+
+    def __init__(self, token_budget: int = 6000, verbatim_turns: int = 6, summary_tokens: int = 600,
+                 summarizer: Callable[[str, List[Dict], int], str] = ExtractiveSummarizer):
+        self.token_budget = token_budget
+        self.verbatim_turns = verbatim_turns
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+
+        self._lock = threading.Lock()
+        self._summary = ""
+        self._last_folded: Optional[Dict] = None
+
+    def _fold(self, older: List[Dict]) -> str:
+        """Return the summary of older, reusing the cached summary when the window only slid forward."""
+        if not older:
+            self._summary, self._last_folded = "", None
+            return ""
+
+        if self._last_folded is not None and older[-1] == self._last_folded:
+            return self._summary
+
+        start = None
+        if self._last_folded is not None:
+            for index in range(len(older) - 1, -1, -1):
+                if older[index] == self._last_folded:
+                    start = index + 1
+                    break
+
+        if start is None:
+            # History was reset or replaced; rebuild from scratch
+            self._summary = self.summarizer("", older, self.summary_tokens)
+        else:
+            self._summary = self.summarizer(self._summary, older[start:], self.summary_tokens)
+        self._last_folded = dict(older[-1])
+        return self._summary
+
+    def build(self, system_messages: List[Dict], history: List[Dict], query: Dict) -> List[Dict]:
+        """Return system messages, summary, recent turns and the query within the token budget."""
+        split = max(len(history) - self.verbatim_turns * 2, 0)
+        older, recent = history[:split], history[split:]
+
+        with self._lock:
+            summary = self._fold(older)
+
+        summary_messages = []
+        if summary:
+            summary_messages = [{"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"}]
+
+        fixed_tokens = CountMessageTokens(system_messages) + CountMessageTokens([query])
+        recent_tokens = [CountTokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS for message in recent]
+
+        # Drop the oldest verbatim messages, then the summary, until the prompt fits
+        while recent and fixed_tokens + CountMessageTokens(summary_messages) + sum(recent_tokens) > self.token_budget:
+            recent = recent[1:]
+            recent_tokens = recent_tokens[1:]
+        if summary_messages and fixed_tokens + CountMessageTokens(summary_messages) > self.token_budget:
+            summary_messages = []
+
+        return system_messages + summary_messages + recent + [query]
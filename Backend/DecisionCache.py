@@ -0,0 +1,114 @@
+import os
+import re
+import json
+import time
+import atexit
+import threading
+from typing import Dict, List, Optional
+
+from Backend.LocalDMM import Normalize
+from Backend.PersistentCache import PersistentLRUCache
+
+CACHE_DB_PATH = os.path.join("Data", "DecisionCache.db")
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# How long a decision stays valid, by label prefix; a compound decision uses its shortest TTL
+LabelTTLs = {
+    "realtime": 10 * MINUTE,
+    "general": DAY,
+    "reminder": DAY,
+    "google search": 7 * DAY,
+    "youtube search": 7 * DAY,
+    "generate image": 7 * DAY,
+    "content": 7 * DAY,
+    "open": 30 * DAY,
+    "close": 30 * DAY,
+    "play": 30 * DAY,
+    "system": 30 * DAY,
+    "exit": 30 * DAY,
+}
+DEFAULT_TTL = DAY
+
+
+def CacheKey(query: str) -> str:
+    """Normalized form of a query: lowercase, no wake word or politeness, no punctuation."""
+    text = Normalize(query)
+    text = re.sub(r"[^\w\s']", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def DecisionTTL(labels: List[str]) -> float:
+    ttls = []
+    for label in labels:
+        matches = [ttl for prefix, ttl in LabelTTLs.items() if label.startswith(prefix)]
+        ttls.append(min(matches) if matches else DEFAULT_TTL)
+    return min(ttls) if ttls else DEFAULT_TTL
+
+
+class DecisionCache(PersistentLRUCache):
+    """Persistent LRU cache of FirstLayerDMM decisions with per-label TTLs.
+
+    Entries are keyed on the normalized query and expire after the shortest
+    TTL of their labels; storage and LRU order are PersistentLRUCache's.
+    """
+
+    table = "decisions"
+    schema = "key TEXT PRIMARY KEY, labels TEXT NOT NULL, expires REAL NOT NULL, last_used REAL NOT NULL"
+    value_columns = ("labels", "expires")
+    counters = ("hits", "misses", "expired", "evictions")
+
+    def __init__(self, db_path: str = CACHE_DB_PATH, max_entries: int = 2000):
+        super().__init__(db_path, max_entries)
+
+    def _purge_condition(self, now: float):
+        return "expires < ?", (now,)
+
+    def _decode(self, entry: Dict) -> Dict:
+        return {**entry, "labels": json.loads(entry["labels"])}
+
+    def _encode(self, entry: Dict) -> Dict:
+        return {**entry, "labels": json.dumps(entry["labels"])}
+
+    def get(self, query: str) -> Optional[List[str]]:
+        key = CacheKey(query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry["expires"] < now:
+                self._delete(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._touch(key, now)
+            self.hits += 1
+            return list(entry["labels"])
+
+    def put(self, query: str, labels: List[str]):
+        if not labels:
+            return
+        key = CacheKey(query)
+        if not key:
+            return
+
+        now = time.time()
+        self._store(key, {"labels": list(labels), "expires": now + DecisionTTL(labels), "last_used": now})
+
+
+_cache: Optional[DecisionCache] = None
+_cache_lock = threading.Lock()
+
+
+def GetDecisionCache() -> DecisionCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DecisionCache()
+            atexit.register(_cache.save)
+        return _cache
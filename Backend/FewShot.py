@@ -0,0 +1,82 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional
+
+from Backend.TextIndex import BM25Index, Tokenize
+
+EXAMPLE_BANK_PATH = os.path.join("Data", "DMMExamples.jsonl")
+
+CompoundQuery = re.compile(r"\b(?:and|then)\b|,")
+
+
+class ExampleBank:
+    """Labelled DMM examples with a BM25 index for picking the few-shot history per query.
+
+    Data/DMMExamples.jsonl holds one {"query", "labels"} object per line.
+    Stop words are kept when indexing because short command words ("open",
+    "play", "is") carry most of the signal in a classification query.
+    """
+
+    def __init__(self, examples: List[Dict]):
+        self.examples = examples
+        self.index = BM25Index([Tokenize(example["query"], drop_stopwords=False) for example in examples])
+        self._compound = [index for index, example in enumerate(examples) if len(example["labels"]) > 1]
+
+    @classmethod
+    def load(cls, path: str = EXAMPLE_BANK_PATH) -> "ExampleBank":
+        examples = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    example = json.loads(line)
+                    examples.append({"query": example["query"], "labels": list(example["labels"])})
+        return cls(examples)
+
+    def select(self, query: str, k: int = 6) -> List[Dict]:
+        """The k examples most similar to query, least similar first so the closest sits next to it."""
+        hits = [index for index, _ in self.index.search(Tokenize(query, drop_stopwords=False), k)]
+
+        # A compound query needs at least one example of splitting labels with commas
+        if CompoundQuery.search(query.lower()) and not any(index in self._compound for index in hits):
+            compound = self.index.search(Tokenize(query, drop_stopwords=False), len(self.examples))
+            best = next((index for index, _ in compound if index in self._compound), None)
+            if best is None and self._compound:
+                best = self._compound[0]
+            if best is not None:
+                hits = hits[:k - 1] + [best]
+
+        # Pad queries with little word overlap with the start of the bank, which covers every label
+        for index in range(len(self.examples)):
+            if len(hits) >= k:
+                break
+            if index not in hits:
+                hits.append(index)
+        return [self.examples[index] for index in reversed(hits)]
+
+    def chat_history(self, query: str, k: int = 6) -> List[Dict]:
+        """Selected examples in Cohere's chat_history format."""
+        history = []
+        for example in self.select(query, k):
+            history.append({"role": "User", "message": example["query"]})
+            history.append({"role": "Chatbot", "message": ", ".join(example["labels"])})
+        return history
+
+
+_bank: Optional[ExampleBank] = None
+_bank_lock = threading.Lock()
+
+
+def GetExampleBank() -> Optional[ExampleBank]:
+    """The shared example bank, or None if Data/DMMExamples.jsonl is missing or unreadable."""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            try:
+                _bank = ExampleBank.load()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error loading example bank: {e}")
+                return None
+        return _bank
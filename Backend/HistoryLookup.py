@@ -0,0 +1,90 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from Backend.ChatLogStore import GetChatLog
+from Backend.LocalDMM import Normalize
+from Backend.TextIndex import Tokenize
+
+# Phrasings that ask about earlier conversations rather than about the world
+HistoryPatterns = [
+    re.compile(r"\bwhat (?:did|have) you (?:tell|told|say|said|answer|answered)(?: me| to me)? (?:about|regarding|on) (?P<topic>.+)"),
+    re.compile(r"\bwhat did (?:i|we) (?:ask|asked|say|said|talk|discuss)(?: you)? (?:about|regarding) (?P<topic>.+)"),
+    re.compile(r"^(?:did|have) (?:we|i|you) (?:talk|talked|speak|spoke|discuss|discussed|mention|mentioned|ask|asked)(?: you)? (?:about )?(?P<topic>.+)"),
+    re.compile(r"\bremind me what you (?:said|told me) (?:about|regarding) (?P<topic>.+)"),
+    re.compile(r"\bsearch (?:my|our) (?:chat )?history for (?P<topic>.+)"),
+]
+
+# The answers HistoryLookup itself gives, which must not be found as if they were the original turn
+LookupReply = re.compile(r"^On [^:]+, (?:I told you|you said): ")
+
+# Candidates fetched before lookup replies and history questions are filtered out
+SearchCandidates = 10
+
+TimePatterns = [
+    (re.compile(r"\b(?:earlier )?today\b"), lambda now: now.replace(hour=0, minute=0, second=0, microsecond=0)),
+    (re.compile(r"\byesterday\b"), lambda now: (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)),
+    (re.compile(r"\b(?:last|this|past) week\b"), lambda now: now - timedelta(days=7)),
+    (re.compile(r"\b(?:last|this|past) month\b"), lambda now: now - timedelta(days=31)),
+    (re.compile(r"\b(?:last|this|past) year\b"), lambda now: now - timedelta(days=366)),
+]
+
+
+def ParseHistoryQuery(query: str) -> Optional[Tuple[List[str], Optional[str]]]:
+    """Return (search terms, ISO lower time bound) if query asks about past conversations."""
+    # Without wake words and politeness, so "jarvis, did we talk about..." still starts with the question
+    text = Normalize(query)
+
+    since = None
+    now = datetime.now()
+    for pattern, start in TimePatterns:
+        if pattern.search(text):
+            since = start(now).isoformat()
+            text = pattern.sub(" ", text)
+            break
+
+    days_ago = re.search(r"\b(\d+) days? ago\b", text)
+    if days_ago:
+        since = (now - timedelta(days=int(days_ago.group(1)) + 1)).isoformat()
+        text = text.replace(days_ago.group(0), " ")
+
+    text = re.sub(r"\s+", " ", text).strip()
+    for pattern in HistoryPatterns:
+        match = pattern.search(text)
+        if match:
+            terms = Tokenize(match.group("topic"))
+            return (terms, since) if terms else None
+    return None
+
+
+def _FirstOriginal(results: List[Dict]) -> Optional[Dict]:
+    """First result that is neither a history question nor an earlier lookup answer."""
+    for entry in results:
+        if not LookupReply.match(entry["content"]) and ParseHistoryQuery(entry["content"]) is None:
+            return entry
+    return None
+
+
+def HistoryLookup(query: str) -> Optional[str]:
+    """Answer a history question from the local chat log, or None if it is not one or nothing matches."""
+    parsed = ParseHistoryQuery(query)
+    if parsed is None:
+        return None
+
+    terms, since = parsed
+    chat_log = GetChatLog()
+    entry = _FirstOriginal(chat_log.search(terms, limit=SearchCandidates, role="assistant", since=since))
+    if entry is None:
+        # Fall back to what the user said on the topic in earlier conversations; in this one
+        # it would only find the question being asked
+        entry = _FirstOriginal(chat_log.search(terms, limit=SearchCandidates, role="user", since=since,
+                                               earlier_sessions_only=True))
+    if entry is None:
+        return None
+
+    try:
+        when = datetime.fromisoformat(entry["timestamp"]).strftime("%A, %d %B %Y")
+    except ValueError:
+        when = "earlier"
+    speaker = "I told you" if entry["role"] == "assistant" else "you said"
+    return f"On {when}, {speaker}: {entry['content']}"
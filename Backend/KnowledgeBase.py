@@ -0,0 +1,190 @@
+import os
+import json
+import math
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from dotenv import dotenv_values
+from Backend.DecisionCache import CacheKey
+from Backend.TextIndex import Stem, StopWords, Tokenize
+
+env_vars = dotenv_values(".env")
+# Weighted token overlap (0-1) a stored question needs to answer a query
+KnowledgeThreshold = float(env_vars.get("KnowledgeThreshold") or 0.8)
+
+KNOWLEDGE_PATH = os.path.join("Data", "Knowledge.jsonl")
+
+# A token that only sounds the same ("chiraiyu" for "chirayu") counts for this much of a match
+PHONETIC_WEIGHT = 0.8
+# Not content here, though TextIndex keeps them
+ExtraStopWords = {"am", "i'm", "im", "know"}
+
+_SOUNDEX_CODES = {
+    **dict.fromkeys("bfpv", "1"), **dict.fromkeys("cgjkqsxz", "2"), **dict.fromkeys("dt", "3"),
+    "l": "4", **dict.fromkeys("mn", "5"), "r": "6",
+}
+
+
+def Soundex(word: str) -> str:
+    """American Soundex code of word, e.g. "chirayu" -> "C600"; digits are kept as they are."""
+    letters = [char for char in word.lower() if char.isalpha()]
+    if not letters:
+        return word
+    code, last = letters[0].upper(), _SOUNDEX_CODES.get(letters[0], "")
+    for char in letters[1:]:
+        digit = _SOUNDEX_CODES.get(char, "")
+        if digit and digit != last:
+            code += digit
+        if char not in "hw":
+            last = digit
+    return (code + "000")[:4]
+
+
+def KnowledgeTokens(text: str) -> List[str]:
+    """Stemmed tokens of text, with spelled-out initials joined ("b m" -> "bm").
+
+    Stop words are dropped unless nothing else is left, so "who am i" still
+    has tokens to match on.
+    """
+    words, letters = [], ""
+    for word in Tokenize(CacheKey(text).replace(".", " "), drop_stopwords=False):
+        if len(word) == 1 and word.isalpha() and word != "i":
+            letters += word
+            continue
+        if letters:
+            words.append(letters)
+            letters = ""
+        words.append(word if word in StopWords or word in ExtraStopWords else Stem(word))
+    if letters:
+        words.append(letters)
+    content = [word for word in words if word not in StopWords and word not in ExtraStopWords]
+    return content or words
+
+
+class KnowledgeBase:
+    """Local facts about the user, answered without leaving the machine.
+
+    Facts live in a JSON Lines file, one {"questions": [...], "answer": ...}
+    per line. Every question is indexed by its tokens and their Soundex
+    codes, so candidates are found with dictionary lookups. A candidate is
+    scored by IDF-weighted Dice overlap between query and question tokens,
+    where a token that only sounds the same counts PHONETIC_WEIGHT of a
+    match, and it answers when the score reaches threshold.
+    """
+
+    def __init__(self, path: str = KNOWLEDGE_PATH, threshold: float = KnowledgeThreshold):
+        self.path = path
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._facts: List[Dict] = []
+        self._questions: List[Tuple[int, List[str]]] = []
+        self._by_token: Dict[str, Set[int]] = defaultdict(set)
+        self._by_sound: Dict[str, Set[int]] = defaultdict(set)
+        self._document_frequency: Counter = Counter()
+        self.load()
+
+    def load(self):
+        facts = []
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        facts.append(json.loads(line))
+        with self._lock:
+            self._facts = []
+            self._questions = []
+            self._by_token.clear()
+            self._by_sound.clear()
+            self._document_frequency.clear()
+            for fact in facts:
+                self._index(fact)
+
+    def _index(self, fact: Dict):
+        fact_id = len(self._facts)
+        self._facts.append(fact)
+        for question in fact["questions"]:
+            tokens = KnowledgeTokens(question)
+            position = len(self._questions)
+            self._questions.append((fact_id, tokens))
+            for token in set(tokens):
+                self._by_token[token].add(position)
+                self._by_sound[Soundex(token)].add(position)
+                self._document_frequency[token] += 1
+
+    def _weight(self, token: str) -> float:
+        # Tokens no stored question uses weigh the most, so an unknown name is not ignored
+        return math.log(1 + (len(self._questions) + 1) / (self._document_frequency.get(token, 0) + 1))
+
+    def _score(self, query: List[str], question: List[str]) -> float:
+        question_sounds = {Soundex(token): token for token in question}
+        matched = query_weight = 0.0
+        for token in set(query):
+            if token in question:
+                weight = self._weight(token)
+                matched += weight
+            elif Soundex(token) in question_sounds:
+                # Weighed as the stored token it stands for, not as an unknown word
+                weight = self._weight(question_sounds[Soundex(token)])
+                matched += PHONETIC_WEIGHT * weight
+            else:
+                weight = self._weight(token)
+            query_weight += weight
+        total = query_weight + sum(self._weight(token) for token in set(question))
+        return 2 * matched / total if total else 0.0
+
+    def match(self, query: str) -> Optional[Tuple[Dict, float]]:
+        """Best matching fact for query and its score, or None below the threshold."""
+        tokens = KnowledgeTokens(query)
+        with self._lock:
+            candidates = set()
+            for token in tokens:
+                candidates |= self._by_token.get(token, set()) | self._by_sound.get(Soundex(token), set())
+            best, best_score = None, self.threshold
+            for position in candidates:
+                fact_id, question = self._questions[position]
+                score = self._score(tokens, question)
+                if score >= best_score:
+                    best, best_score = self._facts[fact_id], score
+        return (best, best_score) if best is not None else None
+
+    def answer(self, query: str) -> Optional[str]:
+        match = self.match(query)
+        return match[0]["answer"] if match else None
+
+    def add(self, questions: Sequence[str], answer: str):
+        """Store a new fact, asked in any of questions, and make it answerable at once."""
+        questions = [question.strip() for question in questions if question.strip()]
+        if not questions or not answer.strip():
+            raise ValueError("A fact needs at least one question and an answer")
+        fact = {"questions": questions, "answer": answer.strip()}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(fact, ensure_ascii=False) + "\n")
+            self._index(fact)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._facts)
+
+
+_knowledge: Optional[KnowledgeBase] = None
+_knowledge_lock = threading.Lock()
+
+
+def GetKnowledgeBase() -> KnowledgeBase:
+    global _knowledge
+    with _knowledge_lock:
+        if _knowledge is None:
+            _knowledge = KnowledgeBase()
+        return _knowledge
+
+
+def KnowledgeAnswer(query: str) -> Optional[str]:
+    """The stored answer to query, or None when no fact matches well enough."""
+    return GetKnowledgeBase().answer(query)
+
+
+def AddFact(questions: Sequence[str], answer: str):
+    GetKnowledgeBase().add(questions, answer)
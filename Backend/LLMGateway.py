@@ -0,0 +1,356 @@
+import time
+import queue
+import random
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+import httpx
+import cohere
+from groq import AsyncGroq
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+GroqAPIKey = env_vars.get("GroqAPIKey")
+CohereAPIKey = env_vars.get("CohereAPIKey")
+# Point both providers at another server, e.g. Benchmarks.MockLLMServer
+GroqBaseURL = env_vars.get("GroqBaseURL") or "https://api.groq.com"
+CohereBaseURL = env_vars.get("CohereBaseURL") or "https://api.cohere.com"
+GatewayMaxConnections = int(env_vars.get("GatewayMaxConnections") or 20)
+GatewayMaxAttempts = int(env_vars.get("GatewayMaxAttempts") or 3)
+GroqConcurrency = int(env_vars.get("GroqConcurrency") or 4)
+CohereConcurrency = int(env_vars.get("CohereConcurrency") or 4)
+# Deadline for a call when the caller does not give one
+DefaultTimeout = float(env_vars.get("LLMTimeout") or 60)
+# Consecutive failed calls that open a model's circuit, and how long it stays open before a probe
+BreakerThreshold = int(env_vars.get("BreakerThreshold") or 3)
+BreakerCooldown = float(env_vars.get("BreakerCooldown") or 30)
+
+GROQ = "groq"
+COHERE = "cohere"
+
+_DONE = object()
+
+
+def Retryable(error: BaseException) -> bool:
+    """Rate limits, server errors and transport failures are worth another attempt."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 429) or status >= 500
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError, ConnectionError)) or \
+        type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def RetryDelay(error: BaseException, attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff, or the server's Retry-After when it sends one."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or getattr(error, "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        retry_after = None
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without a request when a provider/model circuit is open."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one provider/model.
+
+    Closed, calls go through. After threshold failed calls in a row it opens
+    and calls are rejected at once. When cooldown has passed it is half-open:
+    one probe call goes through, closing the circuit if it succeeds and
+    opening it for another cooldown if it fails.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, threshold: int = BreakerThreshold, cooldown: float = BreakerCooldown):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == self.HALF_OPEN or self._failures >= self.threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """End a call that said nothing about the provider's health, e.g. one cancelled early."""
+        with self._lock:
+            self._probing = False
+
+
+class LLMGateway:
+    """Shared async gateway to the Groq and Cohere APIs.
+
+    All requests run on one event loop in a background thread over a single
+    pooled keep-alive httpx client, so connections (and their TLS sessions)
+    are reused across calls; prewarm() opens them at startup. Each provider
+    has a cap on requests in flight. Failures with 429, 5xx or transport
+    errors are retried with jittered backoff, but only before the first
+    chunk has been delivered and only while the call's deadline allows. The
+    deadline covers queueing for a slot, every attempt and the whole stream.
+    A circuit breaker per provider and model rejects calls straight away
+    with CircuitOpenError while that model keeps failing.
+
+    Synchronous callers use groq_stream()/cohere_stream(), which return
+    ordinary iterators; closing the iterator cancels the request.
+    """
+
+    def __init__(self, groq_api_key: Optional[str] = GroqAPIKey, cohere_api_key: Optional[str] = CohereAPIKey,
+                 groq_base_url: str = GroqBaseURL, cohere_base_url: str = CohereBaseURL,
+                 max_connections: int = GatewayMaxConnections, max_attempts: int = GatewayMaxAttempts,
+                 concurrency: Optional[Dict[str, int]] = None,
+                 breaker_threshold: int = BreakerThreshold, breaker_cooldown: float = BreakerCooldown):
+        self.groq_api_key = groq_api_key
+        self.cohere_api_key = cohere_api_key
+        self.base_urls = {GROQ: groq_base_url.rstrip("/"), COHERE: cohere_base_url.rstrip("/")}
+        self.max_connections = max_connections
+        self.max_attempts = max(1, max_attempts)
+        self.concurrency = concurrency or {GROQ: GroqConcurrency, COHERE: CohereConcurrency}
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "failures": 0, "timeouts": 0, "cancelled": 0, "rejected": 0}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="LLMGateway", daemon=True)
+        self._thread.start()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._clients: Dict[str, Any] = {}
+        self._limits: Dict[str, asyncio.Semaphore] = {}
+        self._run(self._setup())
+
+    def _run(self, coroutine, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    async def _setup(self):
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_connections,
+                                max_keepalive_connections=self.max_connections, keepalive_expiry=120),
+            timeout=httpx.Timeout(DefaultTimeout, connect=10),
+        )
+        self._limits = {provider: asyncio.Semaphore(limit) for provider, limit in self.concurrency.items()}
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def breaker(self, provider: str, model: Optional[str] = None) -> CircuitBreaker:
+        name = f"{provider}/{model}" if model else provider
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            return breaker
+
+    def available(self, provider: str, model: Optional[str] = None) -> bool:
+        """Whether a call to model would be attempted now rather than rejected by its circuit."""
+        return self.breaker(provider, model).state != CircuitBreaker.OPEN
+
+    def _client(self, provider: str):
+        # Created on first use so a missing key only fails the calls that need it
+        client = self._clients.get(provider)
+        if client is None:
+            if provider == GROQ:
+                client = AsyncGroq(api_key=self.groq_api_key, base_url=self.base_urls[GROQ],
+                                   http_client=self._http, max_retries=0)
+            else:
+                client = cohere.AsyncClient(api_key=self.cohere_api_key, base_url=self.base_urls[COHERE],
+                                            httpx_client=self._http)
+            self._clients[provider] = client
+        return client
+
+    async def _prewarm(self):
+        async def touch(url):
+            try:
+                await self._http.head(url, timeout=5)
+            except httpx.HTTPError as e:
+                print(f"Error pre-warming {url}: {e}")
+        await asyncio.gather(*(touch(url) for url in self.base_urls.values()))
+
+    def prewarm(self, wait: bool = False):
+        """Open pooled connections to both providers so the first request skips DNS, TCP and TLS setup."""
+        future = asyncio.run_coroutine_threadsafe(self._prewarm(), self._loop)
+        if wait:
+            future.result()
+
+    async def _attempts(self, provider: str, open_stream: Callable, extract: Callable,
+                        deadline: float) -> AsyncIterator:
+        async with self._limits[provider]:
+            for attempt in range(self.max_attempts):
+                self._count("requests")
+                delivered = False
+                try:
+                    stream = await open_stream(max(0.1, deadline - time.monotonic()))
+                    async for item in stream:
+                        value = extract(item)
+                        if value is not None:
+                            delivered = True
+                            yield value
+                    return
+                except Exception as e:
+                    delay = RetryDelay(e, attempt)
+                    if delivered or not Retryable(e) or attempt + 1 == self.max_attempts \
+                            or time.monotonic() + delay >= deadline:
+                        raise
+                    self._count("retries")
+                    print(f"{provider} request failed ({e}), retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+
+    async def astream(self, provider: str, open_stream: Callable, extract: Callable,
+                      deadline: Optional[float] = None, model: Optional[str] = None) -> AsyncIterator:
+        """Async iterator over a provider stream with retries, bounded by deadline (time.monotonic())."""
+        breaker = self.breaker(provider, model)
+        if not breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{provider} circuit for {model or 'all models'} is open")
+
+        deadline = deadline if deadline is not None else time.monotonic() + DefaultTimeout
+        stream = self._attempts(provider, open_stream, extract, deadline)
+        delivered = False
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                try:
+                    item = await asyncio.wait_for(stream.__anext__(), remaining)
+                except StopAsyncIteration:
+                    breaker.record_success()
+                    return
+                delivered = True
+                yield item
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            breaker.record_failure()
+            raise TimeoutError(f"{provider} request exceeded its deadline") from None
+        except Exception as e:
+            if Retryable(e):
+                breaker.record_failure()
+            else:
+                breaker.release()
+            raise
+        except BaseException:
+            # Cancelled or closed by the caller
+            if delivered:
+                breaker.record_success()
+            else:
+                breaker.release()
+            raise
+        finally:
+            await stream.aclose()
+
+    def _sync_stream(self, provider: str, open_stream: Callable, extract: Callable,
+                     deadline: Optional[float], model: Optional[str] = None) -> Iterator:
+        items: "queue.Queue" = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in self.astream(provider, open_stream, extract, deadline, model):
+                    items.put(item)
+                items.put(_DONE)
+            except asyncio.CancelledError:
+                self._count("cancelled")
+                items.put(_DONE)
+                raise
+            except Exception as e:
+                self._count("failures")
+                items.put(e)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def groq_stream(self, deadline: Optional[float] = None, **kwargs) -> Iterator[str]:
+        """Text deltas of a streamed Groq chat completion; kwargs go to chat.completions.create."""
+        async def open_stream(timeout):
+            return await self._client(GROQ).chat.completions.create(stream=True, timeout=timeout, **kwargs)
+
+        def extract(chunk):
+            return chunk.choices[0].delta.content if chunk.choices else None
+
+        return self._sync_stream(GROQ, open_stream, extract, deadline, kwargs.get("model"))
+
+    def cohere_stream(self, deadline: Optional[float] = None, **kwargs) -> Iterator:
+        """Events of a streamed Cohere chat; kwargs go to chat_stream."""
+        async def open_stream(timeout):
+            return self._client(COHERE).chat_stream(
+                request_options={"timeout_in_seconds": max(1, int(timeout)), "max_retries": 0}, **kwargs
+            )
+
+        return self._sync_stream(COHERE, open_stream, lambda event: event, deadline, kwargs.get("model"))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._counters)
+            breakers = dict(self._breakers)
+        stats["circuits"] = {name: breaker.state for name, breaker in breakers.items()}
+        return stats
+
+    def close(self):
+        try:
+            self._run(self._http.aclose(), timeout=5)
+        except Exception as e:
+            print(f"Error closing LLM gateway: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def GetGateway() -> LLMGateway:
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -0,0 +1,189 @@
+import re
+from typing import List, Optional, Tuple
+
+from dotenv import dotenv_values
+
+env_vars = dotenv_values(".env")
+Assistantname = (env_vars.get("Assistantname") or "jarvis").lower()
+
+# Confidence at or above which the local result is used instead of the LLM
+FastPathThreshold = float(env_vars.get("FastPathThreshold") or 0.9)
+
+WakeWords = re.compile(
+    rf"^(?:(?:hey|hi|hello|ok|okay|yo)\s+)?(?:{re.escape(Assistantname)}|jarvis)\b[\s,]*"
+)
+Politeness = re.compile(r"^(?:please\s+|(?:can|could|would|will) you(?: please)?\s+|i want you to\s+|just\s+)+")
+TrailingPoliteness = re.compile(r"\s+(?:please|for me|now|right now)$")
+
+AppPrefix = re.compile(r"^(?:the|my)\s+")
+AppSuffix = re.compile(r"\s+(?:app|application|website|browser|tab)$")
+# "open chess.com": a site the browser can open even though it is not in KnownApps
+Domain = re.compile(r"^[\w-]+(?:\.[\w-]+)+$")
+
+SystemCommands = {
+    "mute": "system mute",
+    "mute volume": "system mute",
+    "mute the volume": "system mute",
+    "unmute": "system unmute",
+    "unmute volume": "system unmute",
+    "volume up": "system volume up",
+    "increase volume": "system volume up",
+    "increase the volume": "system volume up",
+    "turn up the volume": "system volume up",
+    "volume down": "system volume down",
+    "decrease volume": "system volume down",
+    "decrease the volume": "system volume down",
+    "turn down the volume": "system volume down",
+}
+
+ChitChat = {
+    "how are you", "how are you doing", "hello", "hi", "hey", "good morning", "good afternoon",
+    "good evening", "good night", "thank you", "thanks", "chat with me", "who are you", "what's up",
+}
+
+ExitCommands = {"exit", "quit", "bye", "goodbye", "bye bye", "see you later", "shut down assistant"}
+
+# Apps and sites the automation layer knows by name, plus any comma-separated KnownApps from .env
+KnownApps = {
+    "spotify", "youtube", "gmail", "google", "facebook", "instagram", "twitter", "linkedin", "github", "discord",
+    "whatsapp", "netflix", "amazon", "chatgpt", "claude", "maps", "drive", "calculator", "notepad", "paint", "cmd",
+    "command prompt", "powershell", "task manager", "control panel", "file explorer", "settings", "chrome",
+    "firefox", "edge", "vs code", "vscode", "word", "excel", "powerpoint", "telegram", "zoom", "teams", "steam",
+    "brave", "opera", "safari",
+} | {name.strip().lower() for name in (env_vars.get("KnownApps") or "").split(",") if name.strip()}
+
+# Open/close verbs are also said of things that are not apps ("close your eyes", "start a timer",
+# "open the file i was working on"), so they only take the fast path for a known app or site
+UnknownTargetConfidence = 0.8
+
+# What "play" is followed by when it is not music or a video ("play a game with me", "play devil's advocate")
+NotMedia = re.compile(
+    r"^(?:a|an)\s+(?!song|track|playlist|podcast|video|movie)|\b(?:game|games|with (?:me|us)|devil's advocate|"
+    r"pretend|along|fair|dead|dumb|it (?:safe|cool)|hard to get|chess|cards|tag)\b"
+)
+# Longest "play" argument still taken for a song or video title
+MaxMediaWords = 6
+
+# Ordered (pattern, builder, confidence); the first pattern matching a whole clause wins
+Rules = [
+    (re.compile(r"^(?:search|look up|find)\s+(?:on\s+)?youtube\s+(?:for\s+)?(?P<q>(?!on\s).+)$"), lambda m: f"youtube search {m['q']}", 0.97),
+    (re.compile(r"^(?:search|look up|find)\s+(?:for\s+)?(?P<q>.+?)\s+on\s+youtube$"), lambda m: f"youtube search {m['q']}", 0.97),
+    (re.compile(r"^youtube\s+search\s+(?:for\s+)?(?P<q>.+)$"), lambda m: f"youtube search {m['q']}", 0.98),
+    (re.compile(r"^(?:search|look up)\s+google\s+(?:for\s+)?(?P<q>(?!on\s).+)$"), lambda m: f"google search {m['q']}", 0.97),
+    (re.compile(r"^(?:search|look up)\s+(?:for\s+)?(?P<q>.+?)\s+on\s+google$"), lambda m: f"google search {m['q']}", 0.97),
+    (re.compile(r"^google(?:\s+search)?\s+(?:for\s+)?(?P<q>.+)$"), lambda m: f"google search {m['q']}", 0.97),
+    # "search for X" was routed to both google search and general in the logs, so leave it to the LLM
+    (re.compile(r"^search\s+(?:for\s+)?(?P<q>.+)$"), lambda m: f"google search {m['q']}", 0.6),
+    (re.compile(r"^(?:generate|create|make|draw)\s+(?:an?\s+)?(?:image|picture|photo|pic)\s+(?P<q>.+)$"), lambda m: f"generate image {m['q']}", 0.97),
+    (re.compile(r"^play\s+(?P<q>.+?)\s+on\s+(?P<p>spotify|youtube)$"), lambda m: f"play {m['p']} {m['q']}", 0.97),
+    (re.compile(r"^play\s+(?P<q>.+)$"), lambda m: f"play {m['q']}", 0.95),
+    (re.compile(r"^(?:open|launch|start|run)\s+(?P<q>.+)$"), lambda m: f"open {AppName(m['q'])}", UnknownTargetConfidence),
+    (re.compile(r"^(?:close|quit|exit|kill|shut)\s+(?P<q>.+)$"), lambda m: f"close {AppName(m['q'])}", UnknownTargetConfidence),
+    (re.compile(r"^remind me (?:to\s+)?(?P<q>.+?)\s+at\s+(?P<t>\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?)$"), lambda m: f"reminder {ReminderTime(m['t'])} {m['q']}", 0.95),
+    (re.compile(r"^remind me (?:at\s+)?(?P<t>\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)?)\s+(?:to\s+)?(?P<q>.+)$"), lambda m: f"reminder {ReminderTime(m['t'])} {m['q']}", 0.95),
+    (re.compile(r"^remind me\b.*$"), lambda m: f"reminder {m.group(0)[len('remind me'):].strip()}", 0.5),
+]
+
+# Verbs that may start a new clause after "and"/"then" in a compound command
+ClauseVerbs = re.compile(r"^(?:open|launch|start|run|close|quit|kill|play|search|look up|find|google|youtube|generate|create|make|draw|remind|mute|unmute|increase|decrease|turn|volume)\b")
+QuestionWords = re.compile(r"\b(?:what|who|why|how|when|where|which|whose|whom|is|are|does|do|can|should)\b")
+
+
+def AppName(name: str) -> str:
+    """name without a leading "the"/"my", and without a trailing "app"/"website"/... when a known app is left."""
+    name = AppPrefix.sub("", name.strip()).strip()
+    stripped = AppSuffix.sub("", name).strip()
+    return stripped if stripped in KnownApps else name
+
+
+def KnownTarget(name: str) -> bool:
+    return name in KnownApps or bool(Domain.match(name))
+
+
+def MediaLike(text: str) -> bool:
+    return len(text.split()) <= MaxMediaWords and not NotMedia.search(text)
+
+
+def ReminderTime(text: str) -> str:
+    return text.replace(" ", "").replace(".", "")
+
+
+def Normalize(prompt: str) -> str:
+    text = prompt.lower().strip()
+    text = re.sub(r"[’`]", "'", text)
+    text = re.sub(r"[!?.;]+$", "", text).strip()
+    text = WakeWords.sub("", text)
+    text = Politeness.sub("", text)
+    text = TrailingPoliteness.sub("", text)
+    return re.sub(r"\s+", " ", text).strip(" ,")
+
+
+def SplitClauses(text: str) -> List[str]:
+    """Split compound commands on and/then/commas, but only where a new command starts."""
+    pieces = re.split(r"\s*(?:,\s*(?:and\s+|then\s+)?|\s+and then\s+|\s+then\s+|\s+and\s+)\s*", text)
+    clauses: List[str] = []
+    last_verb = None
+    for piece in pieces:
+        piece = piece.strip()
+        if not piece:
+            continue
+        verb = re.match(r"^(open|launch|start|close|quit|kill)\b", piece)
+        if not clauses or ClauseVerbs.match(piece):
+            clauses.append(piece)
+            last_verb = verb.group(1) if verb else None
+        elif last_verb and KnownTarget(AppName(piece)):
+            # "open chrome and firefox" -> open chrome, open firefox
+            clauses.append(f"{last_verb} {piece}")
+        elif last_verb:
+            # "open chrome and tell me about gandhi", "open my email and read it": an unrecognised
+            # clause, so the LLM decides
+            clauses.append(piece)
+        else:
+            # Not a new command: the "and" belonged to the argument ("play tom and jerry")
+            clauses[-1] = f"{clauses[-1]} and {piece}"
+    return clauses
+
+
+def ClassifyClause(clause: str) -> Tuple[Optional[str], float]:
+    if clause in ExitCommands:
+        return "exit", 0.97
+    if clause in SystemCommands:
+        return SystemCommands[clause], 0.97
+    if clause in ChitChat:
+        return f"general {clause}?", 0.95
+
+    for pattern, build, confidence in Rules:
+        match = pattern.match(clause)
+        if match:
+            label = build(match)
+            if label.startswith(("open ", "close ")) and KnownTarget(label.split(" ", 1)[1]):
+                confidence = 0.97
+            if label.startswith("play ") and not MediaLike(match["q"]):
+                confidence = min(confidence, 0.7)
+            # Imperatives wrapped around a question ("open up about why...") are left to the LLM
+            if QuestionWords.search(clause.split(" ", 1)[-1]) and not label.startswith(("play", "generate", "reminder")):
+                confidence = min(confidence, 0.7)
+            return label, confidence
+    return None, 0.0
+
+
+def LocalDMM(prompt: str) -> Tuple[List[str], float]:
+    """Classify unambiguous commands locally.
+
+    Returns labels in the same format as FirstLayerDMM plus a confidence; the
+    confidence of a compound command is that of its weakest clause, and any
+    clause that matches no rule makes the whole result unusable (0.0).
+    """
+    text = Normalize(prompt)
+    if not text:
+        return [], 0.0
+
+    labels = []
+    confidence = 1.0
+    for clause in SplitClauses(text):
+        label, clause_confidence = ClassifyClause(clause)
+        if label is None:
+            return [], 0.0
+        labels.append(label)
+        confidence = min(confidence, clause_confidence)
+    return labels, confidence
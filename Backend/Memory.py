@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from Backend.ChatLogStore import GetChatLog
+from Backend.TextIndex import Tokenize
+
+MEMORY_DB_PATH = os.path.join("Data", "Memory.db")
+
+
+class ConversationMemory:
+    """Local retrieval index over past user/assistant exchanges.
+
+    Each exchange is stored as one row in Data/Memory.db with an FTS5 index
+    (BM25 ranking) kept current by an insert trigger, so adding a turn is a
+    single INSERT and retrieval never scans the history. Everything runs
+    in-process on the CPU; nothing is sent over the network.
+    """
+
+    def __init__(self, db_path: str = MEMORY_DB_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._pending_user: Optional[str] = None
+        self._init_database()
+
+    def _init_database(self):
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # The index can always be rebuilt from the chat log, so skip the per-commit fsync
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS turns (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user TEXT NOT NULL,
+                    assistant TEXT NOT NULL,
+                    timestamp TEXT NOT NULL
+                )
+            ''')
+            self._conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5 (
+                    user,
+                    assistant,
+                    content='turns',
+                    content_rowid='id',
+                    tokenize='porter unicode61'
+                )
+            ''')
+            self._conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+                    INSERT INTO turns_fts (rowid, user, assistant) VALUES (new.id, new.user, new.assistant);
+                END
+            ''')
+            self._conn.commit()
+
+    def add_turn(self, user: str, assistant: str, timestamp: Optional[str] = None):
+        self.add_turns([(user, assistant, timestamp)])
+
+    def add_turns(self, turns: Iterable[Tuple[str, str, Optional[str]]]):
+        """Index several exchanges in one transaction."""
+        rows = [(user, assistant, timestamp or datetime.now().isoformat()) for user, assistant, timestamp in turns]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT INTO turns (user, assistant, timestamp) VALUES (?, ?, ?)", rows)
+
+    def observe(self, entries: List[Dict]):
+        """Pair consecutive user/assistant chat log entries into exchanges and index them."""
+        turns = []
+        with self._lock:
+            for entry in entries:
+                if entry["role"] == "user":
+                    self._pending_user = entry["content"]
+                elif entry["role"] == "assistant" and self._pending_user is not None:
+                    turns.append((self._pending_user, entry["content"], entry.get("timestamp")))
+                    self._pending_user = None
+            self.add_turns(turns)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM turns").fetchone()[0]
+
+    def retrieve(self, query: str, k: int = 3, exclude: Iterable[str] = (), min_overlap: float = 0.5) -> List[Dict]:
+        """Top-k past exchanges relevant to query.
+
+        Candidates are ranked by BM25; a result must also contain at least
+        min_overlap of the query's content words, and exchanges whose answer is
+        in exclude (typically the turns already in the prompt) are skipped.
+        """
+        terms = list(dict.fromkeys(Tokenize(query)))
+        if not terms:
+            return []
+
+        exclude = set(exclude)
+        match = " OR ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT turns.user, turns.assistant, turns.timestamp
+                FROM turns_fts JOIN turns ON turns.id = turns_fts.rowid
+                WHERE turns_fts MATCH ?
+                ORDER BY bm25(turns_fts)
+                LIMIT ?
+            ''', (match, k * 4 + len(exclude))).fetchall()
+
+        results = []
+        for user, assistant, timestamp in rows:
+            if assistant in exclude:
+                continue
+            text = f"{user} {assistant}".lower()
+            overlap = sum(1 for term in terms if term in text) / len(terms)
+            if overlap < min_overlap:
+                continue
+            results.append({"user": user, "assistant": assistant, "timestamp": timestamp})
+            if len(results) == k:
+                break
+        return results
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def MemoryPrompt(snippets: List[Dict], max_words: int = 60) -> str:
+    """Render retrieved exchanges as a compact system message body."""
+    def trim(text):
+        words = text.split()
+        return " ".join(words[:max_words]) + ("..." if len(words) > max_words else "")
+
+    lines = ["Relevant excerpts from earlier conversations (use only if helpful):"]
+    for snippet in snippets:
+        lines.append(f"- User asked: {trim(snippet['user'])}\n  You answered: {trim(snippet['assistant'])}")
+    return "\n".join(lines)
+
+
+_memory: Optional[ConversationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def GetMemory() -> ConversationMemory:
+    """Return the process-wide memory index, attached to the chat log so it grows with every write."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            _memory = ConversationMemory()
+            # First run: index the history recorded before the memory existed
+            GetChatLog().add_listener(_memory.observe, backfill=_memory.count() == 0)
+        return _memory
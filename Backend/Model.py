@@ -1,12 +1,28 @@
-import cohere
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
 from rich import print
 from dotenv import dotenv_values
+from Backend.LocalDMM import LocalDMM, FastPathThreshold
+from Backend.DecisionCache import GetDecisionCache
+from Backend.Router import GetRouter, LogDecision, RouterEnabled
+from Backend.FewShot import GetExampleBank
+from Backend.LLMGateway import GetGateway
 
 env_vars = dotenv_values(".env")
-CohereAPIKey = env_vars.get("CohereAPIKey")
+# Worst case for one decision, including retries, before falling back to the local classifier
+DecisionTimeout = float(env_vars.get("DecisionTimeout") or 15)
+DecisionMaxAttempts = int(env_vars.get("DecisionMaxAttempts") or 3)
+# Send the compact preamble with the most similar examples instead of the full static prompt
+DynamicFewShot = (env_vars.get("DynamicFewShot") or "True").strip().lower() in ("true", "1", "yes")
+FewShotExamples = int(env_vars.get("FewShotExamples") or 6)
 
 
-co = cohere.Client(api_key=CohereAPIKey)
+decision_cache = GetDecisionCache()
+router = GetRouter()
 
 
 funcs = [
@@ -15,8 +31,6 @@ funcs = [
     "youtube search", "reminder"
 ]
 
-
-messages = []
 preamble = """
 You are an AI-based Decision-Making Model. Your task is to classify user inputs into one or more of the following functional categories:
 
@@ -65,6 +79,18 @@ Repeat: **Do not respond with an answer. Only return the classified task(s).**
 """
 
 
+# Used with examples picked from Data/DMMExamples.jsonl, which carry the detail of the rules above
+CompactPreamble = """
+Classify the user's query into one or more task labels. Do NOT answer or execute it.
+
+Labels: exit | general (query) | realtime (query) | open (app) | close (app) | play (song) | generate image (prompt) | system (task) | content (topic) | google search (topic) | youtube search (topic) | reminder (time) (message)
+
+- general: static or evergreen knowledge and chit-chat.
+- realtime: anything that changes over time: news, weather, prices, scores, net worth, current office holders.
+- Several requests: one label per request, separated by commas.
+
+Reply with the lowercase label(s) only, in the style of the examples.
+"""
 
 
 ChatHistory = [
@@ -83,42 +109,215 @@ ChatHistory = [
 ]
 
 
+def LocalDecision(prompt: str):
+    """Decision from the fast path, the decision cache or the router, or None to ask Cohere."""
+    # Unambiguous commands are classified locally without a Cohere round trip
+    local_labels, confidence = LocalDMM(prompt)
+    if local_labels and confidence >= FastPathThreshold:
+        print(f"[bold green]Local fast path ({confidence:.2f}):[/bold green] {local_labels}")
+        return local_labels
+
+    cached = decision_cache.get(prompt)
+    if cached is not None:
+        print(f"[bold green]Decision cache hit:[/bold green] {cached} {decision_cache.stats()}")
+        return cached
+
+    routed = router.route(prompt) if RouterEnabled else None
+    if routed is not None:
+        print(f"[bold green]Local router:[/bold green] {routed}")
+        return routed
+
+    return None
+
+
+def MatchLabels(part: str):
+    task = part.replace("\n", "").strip()
+    return [task for func in funcs if task.startswith(func)]
+
+
+def Fallback(prompt: str) -> List[str]:
+    """Best local guess when Cohere cannot be reached in time."""
+    labels, _ = LocalDMM(prompt)
+    return labels or [f"general {prompt}"]
+
+
+class DecisionCancelled(Exception):
+    pass
+
+
+class DecisionEngine:
+    """Streams FirstLayerDMM decisions with bounded state and bounded latency.
+
+    One instance is shared by all threads: each call keeps its own state, and
+    the only shared state is a fixed-size window of recent decisions and some
+    counters. Requests go through the LLM gateway, which retries transport
+    failures within the call's deadline of timeout seconds; a reply that
+    echoes the prompt template is retried here, up to max_attempts requests.
+    If no label is produced in time the local fallback is used.
+    With use_local=False every query goes to Cohere and the decision cache
+    and log are left untouched, which is what the benchmarks need.
+    """
+
+    def __init__(self, gateway=None, timeout: float = DecisionTimeout, max_attempts: int = DecisionMaxAttempts,
+                 history_size: int = 50, dynamic_few_shot: bool = DynamicFewShot, use_local: bool = True):
+        self.gateway = gateway or GetGateway()
+        self.example_bank = GetExampleBank() if dynamic_few_shot else None
+        self.use_local = use_local
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=history_size)
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+        self.cancellations = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _remember(self, prompt: str, labels: List[str]):
+        with self._lock:
+            self.recent.append((prompt, list(labels)))
+
+    def prompt_for(self, prompt: str):
+        """The preamble and few-shot chat history sent to Cohere for prompt."""
+        if self.example_bank is not None:
+            return CompactPreamble, self.example_bank.chat_history(prompt, FewShotExamples)
+        return preamble, ChatHistory
+
+    def _attempt(self, prompt: str, deadline: float, cancel: Optional[threading.Event]) -> Iterator[str]:
+        system_preamble, chat_history = self.prompt_for(prompt)
+        stream = self.gateway.cohere_stream(
+            deadline=deadline,
+            model='command-r-plus',
+            message=prompt,
+            temperature=0.7,
+            chat_history=chat_history,
+            prompt_truncation='OFF',
+            connectors=[],
+            preamble=system_preamble
+        )
+
+        response = ""
+        pending = ""
+        try:
+            for event in stream:
+                if cancel is not None and cancel.is_set():
+                    raise DecisionCancelled()
+                if event.event_type == "text-generation":
+                    response += event.text
+                    pending += event.text
+                    while "," in pending:
+                        part, pending = pending.split(",", 1)
+                        yield from MatchLabels(part)
+            yield from MatchLabels(pending)
+        finally:
+            stream.close()
+        print(f"[bold green]Raw model output:[/bold green] {response}")
+
+    def stream(self, prompt: str, cancel: Optional[threading.Event] = None,
+               timeout: Optional[float] = None) -> Iterator[str]:
+        """Yield each decision label as soon as the model finishes it.
+
+        A label is complete when the comma after it, or the end of the stream,
+        arrives, so callers can start on the first task while later labels are
+        still being generated. Setting cancel stops the stream at the next
+        event without yielding anything further.
+        """
+        self._count("calls")
+        local = LocalDecision(prompt) if self.use_local else None
+        if local is not None:
+            self._remember(prompt, local)
+            yield from local
+            return
+
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        labels: List[str] = []
+        complete = False
+        for attempt in range(self.max_attempts):
+            echoed = False
+            try:
+                for label in self._attempt(prompt, deadline, cancel):
+                    if "(query)" in label:
+                        # The model echoed the preamble's template instead of classifying
+                        echoed = True
+                        continue
+                    labels.append(label)
+                    yield label
+                complete = not echoed
+            except DecisionCancelled:
+                self._count("cancellations")
+                return
+            except TimeoutError:
+                self._count("timeouts")
+                print("[bold red]Decision timed out[/bold red]")
+                break
+            except Exception as e:
+                # The gateway has already retried anything transient
+                print(f"[bold red]Decision failed:[/bold red] {e}")
+                break
+
+            # Labels already handed to the caller cannot be taken back, so only retry from scratch
+            if complete or labels or attempt + 1 == self.max_attempts or time.monotonic() >= deadline:
+                break
+            self._count("retries")
+
+        if complete and labels and self.use_local:
+            decision_cache.put(prompt, labels)
+            # LLM decisions are the training data for the local router
+            LogDecision(prompt, labels)
+        elif not labels:
+            self._count("fallbacks")
+            labels = Fallback(prompt)
+            print(f"[bold yellow]Using local fallback:[/bold yellow] {labels}")
+            yield from labels
+        self._remember(prompt, labels)
+
+    def decide(self, prompt: str, cancel: Optional[threading.Event] = None,
+               timeout: Optional[float] = None) -> List[str]:
+        return list(self.stream(prompt, cancel, timeout))
+
+    def decide_batch(self, prompts: List[str], concurrency: int = 4,
+                     timeout: Optional[float] = None) -> List[Tuple[List[str], float]]:
+        """Classify prompts with at most concurrency requests in flight.
+
+        Returns (labels, seconds) for each prompt, in input order.
+        """
+        def timed(prompt):
+            start = time.perf_counter()
+            labels = self.decide(prompt, timeout=timeout)
+            return labels, time.perf_counter() - start
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="DecisionBatch") as executor:
+            return list(executor.map(timed, prompts))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "timeouts": self.timeouts,
+                "fallbacks": self.fallbacks,
+                "cancellations": self.cancellations,
+            }
+
+
+engine = DecisionEngine()
+
+
+def FirstLayerDMMStream(prompt: str = "test"):
+    return engine.stream(prompt)
+
+
 def FirstLayerDMM(prompt: str = "test"):
-    messages.append({"role": "user", "content": prompt})
-
-    stream = co.chat_stream(
-        model='command-r-plus',
-        message=prompt,
-        temperature=0.7,
-        chat_history=ChatHistory,
-        prompt_truncation='OFF',
-        connectors=[],
-        preamble=preamble
-    )
-
-
-    response = ""
-    for event in stream:
-        if event.event_type == "text-generation":
-            response += event.text
-
-    print(f"[bold green]Raw model output:[/bold green] {response}")
-
-    
-    response = response.replace("\n", "")
-    response_list = [i.strip() for i in response.split(",")]
-
-    temp = []
-    for task in response_list:
-        for func in funcs:
-            if task.startswith(func):
-                temp.append(task)
-
- 
-    if "(query)" in temp:
-        return FirstLayerDMM(prompt=prompt)
-    else:
-        return temp
+    return engine.decide(prompt)
+
+
+def ClassifyBatch(prompts: List[str], concurrency: int = 4):
+    return engine.decide_batch(prompts, concurrency)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+
+class PersistentLRUCache:
+    """Size-capped LRU cache written through to one SQLite table.
+
+    Entries are dicts held in an OrderedDict for O(1) lookups and LRU
+    ordering, and written to SQLite on insert so they survive restarts;
+    recency updates from hits are persisted in bulk on the next insert or by
+    save(). Subclasses name the table and its columns, build keys and
+    entries, and decide in get() and _purge_condition() when an entry is
+    fresh, stale or gone.
+    """
+
+    table = ""
+    # Column definitions for CREATE TABLE, including a last_used REAL column
+    schema = ""
+    # A single key column gives plain keys, several give tuple keys
+    key_columns: Tuple[str, ...] = ("key",)
+    value_columns: Tuple[str, ...] = ()
+    counters: Tuple[str, ...] = ("hits", "misses", "evictions")
+    # Counters that count as served for the hit rate
+    served: Tuple[str, ...] = ("hits",)
+
+    def __init__(self, db_path: str, max_entries: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._entries: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self._touched = set()
+        for name in self.counters:
+            setattr(self, name, 0)
+        self._where = " AND ".join(f"{column} = ?" for column in self.key_columns)
+        self._init_database()
+
+    def _init_database(self):
+        columns = self.key_columns + self.value_columns + ("last_used",)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({self.schema})")
+            condition, params = self._purge_condition(time.time())
+            self._conn.execute(f"DELETE FROM {self.table} WHERE {condition}", params)
+            self._conn.commit()
+
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM {self.table} ORDER BY last_used"
+            ).fetchall()
+            size = len(self.key_columns)
+            for row in rows:
+                key = row[0] if size == 1 else tuple(row[:size])
+                self._insert(key, self._decode(dict(zip(columns[size:], row[size:]))))
+
+    def _purge_condition(self, now: float) -> Tuple[str, Tuple]:
+        """SQL condition and parameters for rows too old to load at startup."""
+        raise NotImplementedError
+
+    def _decode(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Entry from its stored column values."""
+        return entry
+
+    def _encode(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """Column values to store for entry."""
+        return entry
+
+    def _key_params(self, key: Hashable) -> Tuple:
+        return key if len(self.key_columns) > 1 else (key,)
+
+    def _insert(self, key: Hashable, entry: Dict):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+    def _remove(self, key: Hashable) -> Dict:
+        self._touched.discard(key)
+        return self._entries.pop(key)
+
+    def _touch(self, key: Hashable, now: float):
+        """Mark a hit on key: most recently used, with last_used saved later."""
+        self._entries.move_to_end(key)
+        self._entries[key]["last_used"] = now
+        self._touched.add(key)
+
+    def _delete(self, key: Hashable):
+        """Drop key from memory and disk right away."""
+        self._remove(key)
+        self._conn.execute(f"DELETE FROM {self.table} WHERE {self._where}", self._key_params(key))
+        self._conn.commit()
+
+    def _store(self, key: Hashable, entry: Dict):
+        """Insert or replace key, evict least recently used entries past max_entries and write through."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._insert(key, entry)
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                old_key = next(iter(self._entries))
+                self._remove(old_key)
+                evicted.append(self._key_params(old_key))
+            self.evictions += len(evicted)
+
+            stored = self._encode(entry)
+            columns = self.key_columns + self.value_columns + ("last_used",)
+            with self._conn:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    (*self._key_params(key), *(stored[column] for column in self.value_columns), entry["last_used"])
+                )
+                self._conn.executemany(f"DELETE FROM {self.table} WHERE {self._where}", evicted)
+                self._save_recency()
+
+    def _save_recency(self):
+        if self._touched:
+            self._conn.executemany(
+                f"UPDATE {self.table} SET last_used = ? WHERE {self._where}",
+                [(self._entries[key]["last_used"], *self._key_params(key))
+                 for key in self._touched if key in self._entries]
+            )
+            self._touched.clear()
+
+    def save(self):
+        """Persist LRU order changes from cache hits."""
+        with self._lock, self._conn:
+            self._save_recency()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            served = sum(getattr(self, name) for name in self.served)
+            lookups = served + self.misses
+            return {
+                "size": len(self._entries),
+                **{name: getattr(self, name) for name in self.counters},
+                "hit_rate": served / lookups if lookups else 0.0,
+            }
@@ -1,18 +1,28 @@
-from googlesearch import search
-from groq import Groq
-from json import load, dump
+import time
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import dotenv_values
-import os
+from Backend.ChatLogStore import GetChatLog
+from Backend.Memory import GetMemory, MemoryPrompt
+from Backend.LLMGateway import GetGateway
+from Backend.WebSearch import SearchStage
+from Backend.SearchBackend import DefaultSearchBackend
+from Backend.SearchCache import ANSWER, SEARCH, GetSearchCache
+from Backend.AnswerCache import ContextReferences
+from Backend.DecisionCache import CacheKey
+from Backend.KnowledgeBase import KnowledgeAnswer
 
 # Load environment variables
 env_vars = dotenv_values(".env")
 Username = env_vars.get("Username")
 Assistantname = env_vars.get("Assistantname")
-GroqAPIKey = env_vars.get("GroqAPIKey")
+AnswerTimeout = float(env_vars.get("AnswerTimeout") or 30)
+# Answer from an expired cache entry at once and refresh it in the background
+SearchStaleWhileRevalidate = (env_vars.get("SearchStaleWhileRevalidate") or "True").strip().lower() in ("true", "1", "yes")
 
-# Init Groq
-client = Groq(api_key=GroqAPIKey)
+# Shared pooled connection to Groq
+gateway = GetGateway()
 
 # System prompt
 BaseSystemPrompt = f"""
@@ -25,29 +35,35 @@ The user is {Username}, also known as Chirayu BM. You must always address him re
 """
 
 
-# Ensure the Data folder exists
-os.makedirs("Data", exist_ok=True)
+# Shared append-only chat history
+chat_log = GetChatLog()
+memory = GetMemory()
 
-# Load past messages (if any)
-try:
-    with open(r"Data\ChatLog.json", "r") as f:
-        messages = load(f)
-except FileNotFoundError:
-    with open(r"Data\ChatLog.json", "w") as f:
-        dump([], f)
-    messages = []
+# Search results (Google, hedged with the local index), fetched and trimmed to the passages that answer the query
+search_stage = SearchStage(search=DefaultSearchBackend())
+search_cache = GetSearchCache()
+_refresher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="SearchRefresh")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
 
-# Google Search wrapper with error handling
-def GoogleSearch(query):
+# Google Search wrapper with error handling; returns (context, found), found False when there is nothing to go on
+def GoogleSearch(query, refresh=False):
+    cached = None if refresh else search_cache.get(SEARCH, query)
+    if cached is not None and cached[1]:
+        return cached[0], True
     try:
-        results = list(search(query, advanced=True, num_results=5))
-        Answer = f"Use the following data for answering the query '{query}':\n[start]\n"
-        for i in results:
-            Answer += f"Title: {i.title}\nDescription: {i.description}\n\n"
-        Answer += "[end]"
-        return Answer
+        search_data = search_stage.context(query)
+        search_cache.put(SEARCH, query, search_data)
+        return search_data, True
     except Exception as e:
-        return f"[start]\n⚠️ Google Search failed due to: {str(e)}\n[end]"
+        if cached is not None:
+            # Stale results beat none
+            return cached[0], True
+        return f"[start]\n⚠️ Google Search failed due to: {str(e)}\n[end]", False
+
+# Answers that lean on earlier turns ("what about tomorrow", "is he alive") are not reused
+def Cacheable(prompt):
+    return not ContextReferences.search(CacheKey(prompt))
 
 # Real-time data like time and date
 def Information():
@@ -59,33 +75,53 @@ def AnswerModifier(Answer):
     return '\n'.join([line for line in Answer.split('\n') if line.strip()])
 
 # Chat Handler
-def RealtimeSearchEngine(prompt):
-    # Reload previous messages
-    try:
-        with open(r"Data\ChatLog.json", "r") as f:
-            messages = load(f)
-    except:
-        messages = []
-
-    # Handle known personal queries locally
-    if prompt.lower().strip() in [
-        "who is chirayu bm?",
-        "who am i?",
-        "tell me about chirayu bm"
-    ]:
-        Answer = (
-            "Chirayu BM is a Computer Science Engineering student specializing in Cybersecurity. "
-            "He is passionate about AI, productivity tools, and mastering cutting-edge technologies. "
-            "He is the creator and current user of this assistant."
-        )
-        messages.append({"role": "user", "content": prompt})
-        messages.append({"role": "assistant", "content": Answer})
-        with open(r"Data\\ChatLog.json", "w") as f:
-            dump(messages, f, indent=4)
+def RealtimeSearchEngine(prompt, on_token=None):
+    # Questions about the user are answered from the local knowledge base
+    Answer = KnowledgeAnswer(prompt)
+    if Answer is not None:
+        chat_log.extend([
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": Answer}
+        ])
+        if on_token is not None:
+            on_token(Answer)
         return Answer
 
+    cached = search_cache.get(ANSWER, prompt) if Cacheable(prompt) else None
+    if cached is not None and (cached[1] or SearchStaleWhileRevalidate):
+        Answer, fresh = cached
+        if not fresh:
+            Revalidate(prompt)
+        if on_token is not None:
+            on_token(Answer)
+        chat_log.extend([
+            {"role": "user", "content": prompt},
+            {"role": "assistant", "content": Answer}
+        ])
+        return AnswerModifier(Answer)
+
+    try:
+        Answer, grounded = GenerateRealtimeAnswer(prompt, on_token)
+    except Exception as e:
+        if on_token is not None:
+            on_token(f"❌ Error: {e}")
+        return f"❌ Error: {e}"
+
+    # Append to log; an answer given without search results is not cached
+    chat_log.extend([{"role": "user", "content": prompt}, {"role": "assistant", "content": Answer}])
+    if grounded and Cacheable(prompt):
+        search_cache.put(ANSWER, prompt, Answer)
+
+    return AnswerModifier(Answer)
+
+
+def GenerateRealtimeAnswer(prompt, on_token=None, refresh=False):
+    """Search, then stream Groq's answer grounded in the results; raises if the LLM call fails.
+
+    Returns (answer, grounded), grounded False when the search failed or found nothing.
+    """
     # Step 1: Get Google Search Results
-    search_data = GoogleSearch(prompt)
+    search_data, grounded = GoogleSearch(prompt, refresh)
 
     # Step 2: Compose system-level context
     system_prompt = [
@@ -94,6 +130,14 @@ def RealtimeSearchEngine(prompt):
         {"role": "system", "content": Information()},
     ]
 
+    # Past exchanges on the same topic, skipping the ones still in the recent window
+    snippets = memory.retrieve(
+        prompt, k=2,
+        exclude=[message["content"] for message in chat_log.messages() if message["role"] == "assistant"]
+    )
+    if snippets:
+        system_prompt.append({"role": "system", "content": MemoryPrompt(snippets)})
+
     # Step 3: User prompt
     user_query = {"role": "user", "content": prompt}
 
@@ -101,33 +145,45 @@ def RealtimeSearchEngine(prompt):
     final_messages = system_prompt + [user_query]
 
     # Step 5: Call Groq's LLaMA
-    try:
-        completion = client.chat.completions.create(
-            model="llama3-70b-8192",
-            messages=final_messages,
-            max_tokens=1024,
-            temperature=0.7,
-            top_p=1,
-            stream=True,
-        )
-
-        Answer = ""
-        for chunk in completion:
-            if chunk.choices[0].delta.content:
-                Answer += chunk.choices[0].delta.content
-
-        Answer = Answer.strip().replace("</s>", "")
-
-        # Append to log
-        messages.append(user_query)
-        messages.append({"role": "assistant", "content": Answer})
-        with open(r"Data\\ChatLog.json", "w") as f:
-            dump(messages, f, indent=4)
-
-        return AnswerModifier(Answer)
-
-    except Exception as e:
-        return f"❌ Error: {e}"
+    completion = gateway.groq_stream(
+        deadline=time.monotonic() + AnswerTimeout,
+        model="llama3-70b-8192",
+        messages=final_messages,
+        max_tokens=1024,
+        temperature=0.7,
+        top_p=1,
+    )
+
+    Answer = ""
+    for text in completion:
+        Answer += text
+        if on_token is not None:
+            on_token(text)
+
+    return Answer.strip().replace("</s>", ""), grounded
+
+
+def Revalidate(prompt):
+    """Refresh the cached search results and answer for prompt in the background, once at a time per query."""
+    key = CacheKey(prompt)
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def refresh():
+        try:
+            Answer, grounded = GenerateRealtimeAnswer(prompt, refresh=True)
+            # Keep the stale answer rather than replace it with one made without results
+            if grounded:
+                search_cache.put(ANSWER, prompt, Answer)
+        except Exception as e:
+            print(f"Error refreshing cached answer for {prompt!r}: {e}")
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    _refresher.submit(refresh)
 
 # Run loop
 if __name__ == "__main__":
@@ -0,0 +1,256 @@
+import os
+import re
+import ast
+import json
+import math
+import sqlite3
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import dotenv_values
+from Backend.LocalDMM import LocalDMM, Normalize, WakeWords
+
+env_vars = dotenv_values(".env")
+# The router answers instead of Cohere only when enabled; until it has been checked with
+# Benchmarks.RouterEvaluation on this user's logs it just collects training data
+RouterEnabled = (env_vars.get("RouterEnabled") or "False").strip().lower() in ("true", "1", "yes")
+# Posterior probability at or above which the router's category is trusted
+RouterThreshold = float(env_vars.get("RouterThreshold") or 0.85)
+
+ROUTER_MODEL_PATH = os.path.join("Data", "RouterModel.json")
+JARVIS_DB_PATH = "jarvis_data.db"
+ASSISTANT_LOG_PATH = os.path.join("Data", "assistant.log")
+
+# Longest prefixes first so "google search" is not read as a bare label
+Categories = sorted([
+    "exit", "general", "realtime", "open", "close", "play", "generate image", "system",
+    "content", "google search", "youtube search", "reminder"
+], key=len, reverse=True)
+
+# Categories whose label is the category followed by the query itself
+QueryCategories = {"general", "realtime"}
+
+# Hand-labelled examples from the DMM preamble and few-shot history, so a model
+# can be trained before any decisions have been logged
+SeedExamples = [
+    ("how are you", "general"), ("do you like pizza?", "general"), ("chat with me.", "general"),
+    ("who is elon musk?", "general"), ("explain newton's laws", "general"), ("what is photosynthesis?", "general"),
+    ("tell me about mahatma gandhi", "general"), ("what is the capital of france?", "general"),
+    ("write a joke about computers", "general"), ("what is a black hole?", "general"),
+    ("who invented the telephone?", "general"), ("how does a car engine work?", "general"),
+    ("what is the net worth of elon musk?", "realtime"), ("today's weather in bangalore", "realtime"),
+    ("who won yesterday's ipl match?", "realtime"), ("what is the latest news?", "realtime"),
+    ("what is the price of bitcoin now?", "realtime"), ("what is trending today?", "realtime"),
+    ("who is the current ceo of twitter?", "realtime"), ("what's the score of the match?", "realtime"),
+    ("will it rain tomorrow?", "realtime"), ("what time is it in london?", "realtime"),
+    ("open youtube", "open"), ("open chrome", "open"), ("launch spotify", "open"),
+    ("close the browser", "close"), ("close chrome", "close"), ("close notepad", "close"),
+    ("play lofi beats on spotify", "play"), ("play despacito", "play"), ("play some music", "play"),
+    ("generate an image of a robot in space", "generate image"), ("create a picture of a dragon", "generate image"),
+    ("remind me to drink water at 5 pm", "reminder"), ("set a reminder for my meeting", "reminder"),
+    ("search google for python tutorials", "google search"), ("google the eiffel tower", "google search"),
+    ("search youtube for cooking videos", "youtube search"), ("find lofi on youtube", "youtube search"),
+    ("what is the battery percentage?", "system"), ("mute the volume", "system"), ("increase the volume", "system"),
+    ("write a letter to my principal", "content"), ("write a poem about stars", "content"),
+    ("exit", "exit"), ("goodbye", "exit"), ("bye jarvis", "exit"),
+]
+
+
+def LabelCategory(label: str) -> Optional[str]:
+    for category in Categories:
+        if label == category or label.startswith(category + " "):
+            return category
+    return None
+
+
+def Features(text: str) -> Counter:
+    """Bag of character 2-4 grams (within word boundaries) and word unigrams."""
+    text = Normalize(text)
+    features = Counter(f"w:{word}" for word in re.findall(r"[\w']+", text))
+    padded = f" {text} "
+    for n in (2, 3, 4):
+        for index in range(len(padded) - n + 1):
+            features[padded[index:index + n]] += 1
+    return features
+
+
+class RouterModel:
+    """Multinomial naive Bayes over character n-grams, small enough to ship as a JSON file."""
+
+    def __init__(self, classes: List[str], log_priors: Dict[str, float],
+                 log_probs: Dict[str, Dict[str, float]], unseen_log_probs: Dict[str, float]):
+        self.classes = classes
+        self.log_priors = log_priors
+        self.log_probs = log_probs
+        self.unseen_log_probs = unseen_log_probs
+
+    @classmethod
+    def train(cls, examples: List[Tuple[str, str]], alpha: float = 0.3) -> "RouterModel":
+        class_counts = Counter(category for _, category in examples)
+        feature_counts: Dict[str, Counter] = defaultdict(Counter)
+        vocabulary = set()
+        for text, category in examples:
+            features = Features(text)
+            feature_counts[category].update(features)
+            vocabulary.update(features)
+
+        total = sum(class_counts.values())
+        classes = sorted(class_counts)
+        log_priors = {category: math.log(class_counts[category] / total) for category in classes}
+        log_probs, unseen = {}, {}
+        for category in classes:
+            denominator = sum(feature_counts[category].values()) + alpha * (len(vocabulary) + 1)
+            log_probs[category] = {
+                feature: math.log((count + alpha) / denominator)
+                for feature, count in feature_counts[category].items()
+            }
+            unseen[category] = math.log(alpha / denominator)
+        return cls(classes, log_priors, log_probs, unseen)
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        features = Features(text)
+        scores = {}
+        for category in self.classes:
+            class_log_probs = self.log_probs[category]
+            unseen = self.unseen_log_probs[category]
+            scores[category] = self.log_priors[category] + sum(
+                count * class_log_probs.get(feature, unseen) for feature, count in features.items()
+            )
+        best = max(scores.values())
+        exp_scores = {category: math.exp(score - best) for category, score in scores.items()}
+        norm = sum(exp_scores.values())
+        return {category: value / norm for category, value in exp_scores.items()}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probabilities = self.predict_proba(text)
+        category = max(probabilities, key=probabilities.get)
+        return category, probabilities[category]
+
+    def save(self, path: str = ROUTER_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        payload = {
+            "classes": self.classes,
+            "log_priors": self.log_priors,
+            "log_probs": self.log_probs,
+            "unseen_log_probs": self.unseen_log_probs,
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str = ROUTER_MODEL_PATH) -> "RouterModel":
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+        return cls(payload["classes"], payload["log_priors"], payload["log_probs"], payload["unseen_log_probs"])
+
+
+def _ensure_decision_table(conn: sqlite3.Connection):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS decision_history
+        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+         query TEXT NOT NULL,
+         decision TEXT NOT NULL,
+         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)
+    ''')
+
+
+def LogDecision(query: str, labels: List[str], db_path: str = JARVIS_DB_PATH):
+    """Record a query and the LLM's decision as a training pair."""
+    try:
+        with sqlite3.connect(db_path) as conn:
+            _ensure_decision_table(conn)
+            conn.execute("INSERT INTO decision_history (query, decision) VALUES (?, ?)", (query, json.dumps(labels)))
+    except sqlite3.Error as e:
+        print(f"Error logging decision: {e}")
+
+
+def LoadLoggedDecisions(db_path: str = JARVIS_DB_PATH, log_path: str = ASSISTANT_LOG_PATH) -> List[Tuple[str, List[str]]]:
+    """Query/decision pairs from the decision_history table and the assistant log."""
+    pairs = []
+    if os.path.exists(db_path):
+        with sqlite3.connect(db_path) as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'decision_history'"
+            ).fetchone()
+            if exists:
+                for query, decision in conn.execute("SELECT query, decision FROM decision_history ORDER BY id"):
+                    pairs.append((query, json.loads(decision)))
+
+    if os.path.exists(log_path):
+        pending = None
+        with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                if " - Processing query: " in line:
+                    pending = line.split(" - Processing query: ", 1)[1].strip()
+                elif " - Decision: " in line and pending:
+                    try:
+                        pairs.append((pending, ast.literal_eval(line.split(" - Decision: ", 1)[1].strip())))
+                    except (ValueError, SyntaxError):
+                        pass
+                    pending = None
+    return pairs
+
+
+def TrainingExamples(pairs: List[Tuple[str, List[str]]], include_seed: bool = True) -> List[Tuple[str, str]]:
+    """Single-intent (query, category) examples; compound decisions are left to the LLM."""
+    examples = list(SeedExamples) if include_seed else []
+    for query, labels in pairs:
+        categories = {LabelCategory(label) for label in labels}
+        if len(categories) == 1 and None not in categories:
+            examples.append((query, categories.pop()))
+    return examples
+
+
+class Router:
+    """Routes single-intent queries with the trained model; None means ask the LLM."""
+
+    def __init__(self, model: Optional[RouterModel], threshold: float = RouterThreshold):
+        self.model = model
+        self.threshold = threshold
+
+    def route(self, prompt: str) -> Optional[List[str]]:
+        if self.model is None:
+            return None
+        text = Normalize(prompt)
+        if not text or re.search(r"\b(?:and|then)\b|,", text):
+            return None
+
+        category, confidence = self.model.predict(text)
+        if confidence < self.threshold:
+            return None
+        if category in QueryCategories:
+            return [f"{category} {WakeWords.sub('', prompt.lower().strip())}"]
+
+        # For commands the label needs an argument, which only the rules can extract reliably
+        labels, _ = LocalDMM(prompt)
+        if len(labels) == 1 and LabelCategory(labels[0]) == category:
+            return labels
+        return None
+
+
+_router: Optional[Router] = None
+_router_lock = threading.Lock()
+
+
+def GetRouter() -> Router:
+    global _router
+    with _router_lock:
+        if _router is None:
+            try:
+                model = RouterModel.load()
+            except (OSError, ValueError, KeyError):
+                model = None
+            _router = Router(model)
+        return _router
+
+
+if __name__ == "__main__":
+    pairs = LoadLoggedDecisions()
+    examples = TrainingExamples(pairs)
+    model = RouterModel.train(examples)
+    model.save()
+    print(f"Trained on {len(examples)} examples ({len(pairs)} logged decisions), saved to {ROUTER_MODEL_PATH}")
+    print(f"Class counts: {dict(Counter(category for _, category in examples))}")
@@ -0,0 +1,239 @@
+import os
+import abc
+import time
+import threading
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Sequence
+
+from dotenv import dotenv_values
+from Backend.TextIndex import BM25Index, Tokenize
+from Backend.WebSearch import GoogleResults, NoSearchResults, SearchResult, TextExtractor
+
+env_vars = dotenv_values(".env")
+# Comma-separated backends in order of preference: google, local
+SearchBackends = [name.strip() for name in (env_vars.get("SearchBackends") or "google,local").split(",") if name.strip()]
+SearchTimeout = float(env_vars.get("SearchTimeout") or 3)
+# Start the next backend when the one before has not answered within this many seconds
+SearchHedgeDelay = float(env_vars.get("SearchHedgeDelay") or 1)
+LocalIndexPath = env_vars.get("LocalIndexPath") or os.path.join("Data", "SearchIndex")
+
+LocalExtensions = (".txt", ".md", ".html", ".htm")
+
+
+class SearchBackend(abc.ABC):
+    """A source of search results: call it with (query, num_results) for a list of SearchResult.
+
+    Subclasses implement search(). timeout is how long callers such as
+    HedgedSearch wait for it.
+    """
+
+    name = "backend"
+
+    def __init__(self, timeout: float = SearchTimeout):
+        self.timeout = timeout
+
+    @abc.abstractmethod
+    def search(self, query: str, num_results: int) -> List[SearchResult]:
+        ...
+
+    def __call__(self, query: str, num_results: int) -> List[SearchResult]:
+        return self.search(query, num_results)
+
+
+class GoogleBackend(SearchBackend):
+    name = "google"
+
+    def search(self, query: str, num_results: int) -> List[SearchResult]:
+        return GoogleResults(query, num_results)
+
+
+class LocalIndexBackend(SearchBackend):
+    """BM25 search over the text, Markdown and HTML files under a directory.
+
+    Results carry the document text, so the search stage does not fetch
+    anything. The index is rebuilt when a file is added, removed or changed.
+    It works offline, and with a fixed directory it is deterministic, which
+    makes it a stand-in for web search in benchmarks.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str = LocalIndexPath, timeout: float = SearchTimeout,
+                 extensions: Sequence[str] = LocalExtensions):
+        super().__init__(timeout)
+        self.directory = directory
+        self.extensions = tuple(extensions)
+        self._lock = threading.Lock()
+        self._versions: Dict[str, float] = {}
+        self._documents: List[Dict] = []
+        self._index = BM25Index([])
+
+    def _scan(self) -> Dict[str, float]:
+        versions = {}
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.lower().endswith(self.extensions):
+                    path = os.path.join(root, name)
+                    versions[path] = os.path.getmtime(path)
+        return versions
+
+    @staticmethod
+    def _read(path: str) -> Dict:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        title = Path(path).stem.replace("_", " ").replace("-", " ")
+        if path.lower().endswith((".html", ".htm")):
+            extractor = TextExtractor()
+            extractor.feed(text)
+            paragraphs = extractor.paragraphs()
+            title = extractor.title.strip() or title
+        else:
+            paragraphs = [" ".join(block.split()) for block in text.split("\n\n") if block.strip()]
+        return {"url": Path(path).resolve().as_uri(), "title": title, "paragraphs": paragraphs}
+
+    def _refresh(self):
+        versions = self._scan()
+        if versions == self._versions:
+            return
+        documents = []
+        for path in sorted(versions):
+            try:
+                documents.append(self._read(path))
+            except OSError as e:
+                print(f"Error indexing {path}: {e}")
+        self._documents = documents
+        self._index = BM25Index([Tokenize(" ".join([document["title"]] + document["paragraphs"]))
+                                 for document in documents])
+        self._versions = versions
+
+    def search(self, query: str, num_results: int) -> List[SearchResult]:
+        tokens = Tokenize(query)
+        with self._lock:
+            self._refresh()
+            hits = self._index.search(tokens, num_results)
+            documents = [self._documents[position] for position, _ in hits]
+
+        terms = set(tokens)
+        results = []
+        for document in documents:
+            paragraphs = document["paragraphs"] or [""]
+            best = max(paragraphs, key=lambda paragraph: len(terms & set(Tokenize(paragraph))))
+            results.append(SearchResult(document["url"], document["title"], best[:300],
+                                        "\n\n".join(document["paragraphs"])))
+        return results
+
+
+class HedgedSearch(SearchBackend):
+    """Query backends in order, starting the next one when the last is slow, and keep the first answer.
+
+    The first backend starts at once; each further one starts after
+    hedge_delay seconds without results, or straight away when the one
+    before fails or comes back empty. The first non-empty result list wins.
+    Each backend is given up on after its own timeout, and the whole search
+    after timeout. Per-backend counts and latencies are kept for stats().
+    When no backend has results, search() raises: the last error if every
+    backend failed, TimeoutError if time ran out, and NoSearchResults if
+    they all came back empty.
+    """
+
+    name = "hedged"
+
+    def __init__(self, backends: Sequence[SearchBackend], hedge_delay: float = SearchHedgeDelay,
+                 timeout: Optional[float] = None):
+        super().__init__(timeout if timeout is not None else max(backend.timeout for backend in backends))
+        self.backends = list(backends)
+        self.hedge_delay = hedge_delay
+        self._executor = ThreadPoolExecutor(max_workers=max(2, 2 * len(self.backends)),
+                                            thread_name_prefix="SearchBackend")
+        self._lock = threading.Lock()
+        self._stats = {backend.name: {"calls": 0, "answered": 0, "wins": 0, "empty": 0, "failures": 0, "timeouts": 0,
+                                      "seconds": 0.0} for backend in self.backends}
+
+    def _record(self, backend: SearchBackend, counter: str, seconds: Optional[float] = None):
+        with self._lock:
+            self._stats[backend.name][counter] += 1
+            if seconds is not None:
+                self._stats[backend.name]["seconds"] += seconds
+
+    def _run(self, backend: SearchBackend, query: str, num_results: int) -> List[SearchResult]:
+        self._record(backend, "calls")
+        start = time.monotonic()
+        try:
+            results = backend.search(query, num_results)
+        except Exception:
+            self._record(backend, "failures", time.monotonic() - start)
+            raise
+        self._record(backend, "empty" if not results else "answered", time.monotonic() - start)
+        return results
+
+    def search(self, query: str, num_results: int) -> List[SearchResult]:
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waiting = list(self.backends)
+        running = {}
+        errors = []
+        next_start = start
+
+        while waiting or running:
+            now = time.monotonic()
+            if waiting and now >= next_start:
+                backend = waiting.pop(0)
+                running[self._executor.submit(self._run, backend, query, num_results)] = (backend, now)
+                next_start = now + self.hedge_delay
+
+            # Give up on backends past their own timeout; their threads finish in the background
+            for future, (backend, started) in list(running.items()):
+                if not future.done() and now - started >= backend.timeout:
+                    del running[future]
+                    self._record(backend, "timeouts")
+                    errors.append(TimeoutError(f"{backend.name} search timed out"))
+                    next_start = now
+
+            if now >= deadline or not (waiting or running):
+                break
+            wake = [deadline] + [started + backend.timeout for backend, started in running.values()]
+            if waiting:
+                wake.append(next_start)
+            timeout = max(0.0, min(wake) - time.monotonic())
+            if not running:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                backend, _ = running.pop(future)
+                try:
+                    results = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    next_start = time.monotonic()
+                    continue
+                if results:
+                    self._record(backend, "wins")
+                    return results
+                next_start = time.monotonic()
+
+        if errors and len(errors) >= len(self.backends):
+            raise errors[-1]
+        if waiting or running:
+            raise TimeoutError(f"No search backend answered within {self.timeout:.1f} s")
+        raise NoSearchResults(f"No search backend found anything for {query!r}")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+
+def DefaultSearchBackend(names: Sequence[str] = SearchBackends) -> SearchBackend:
+    """The backends named in SearchBackends, hedged when there is more than one."""
+    available = {"google": GoogleBackend, "local": LocalIndexBackend}
+    backends = []
+    for name in names:
+        if name not in available:
+            print(f"Unknown search backend {name!r}, skipping")
+            continue
+        backends.append(available[name]())
+    if not backends:
+        backends = [GoogleBackend()]
+    return backends[0] if len(backends) == 1 else HedgedSearch(backends)
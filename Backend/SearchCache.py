@@ -0,0 +1,114 @@
+import os
+import re
+import time
+import atexit
+import threading
+from typing import Optional, Tuple
+
+from dotenv import dotenv_values
+from Backend.DecisionCache import CacheKey, DAY, HOUR, MINUTE
+from Backend.PersistentCache import PersistentLRUCache
+
+env_vars = dotenv_values(".env")
+SearchCacheSize = int(env_vars.get("SearchCacheSize") or 500)
+# Serve an expired entry (and refresh it in the background) until it is this many TTLs old
+SearchStaleFactor = float(env_vars.get("SearchStaleFactor") or 2)
+
+SEARCH_CACHE_DB_PATH = os.path.join("Data", "SearchCache.db")
+
+SEARCH = "search"
+ANSWER = "answer"
+
+# How fast the answer to a query goes out of date, first match wins; a TTL of 0 is never cached
+FreshnessClasses = [
+    ("clock", re.compile(r"\b(?:time|date|clock|o'clock)\b|\bwhat day\b"), 0),
+    ("live", re.compile(r"\b(?:weather|temperature|forecast|rain|price|prices|stock|stocks|share|shares|"
+                        r"score|scores|live|exchange rate|bitcoin|crypto|traffic|sensex|nifty)\b"), 10 * MINUTE),
+    ("news", re.compile(r"\b(?:news|headlines?|latest|today|tonight|yesterday|this week|update|updates|"
+                        r"election|match|result|results|trending|released?)\b"), 2 * HOUR),
+    ("reference", re.compile(r"\b(?:who is|who was|who were|biography|born|history|founded|invented|"
+                             r"capital of|population of|meaning of|definition)\b"), 3 * DAY),
+]
+DEFAULT_FRESHNESS = ("general", DAY)
+
+
+def Freshness(query: str) -> Tuple[str, float]:
+    """Freshness class of query and the TTL that goes with it."""
+    text = CacheKey(query)
+    for name, pattern, ttl in FreshnessClasses:
+        if pattern.search(text):
+            return name, ttl
+    return DEFAULT_FRESHNESS
+
+
+class SearchCache(PersistentLRUCache):
+    """Persistent, size-capped LRU cache of search contexts and realtime answers.
+
+    Entries are keyed by kind (SEARCH or ANSWER) and normalized query, with a
+    TTL from the query's freshness class. get() reports whether an entry is
+    still fresh; an expired one is returned as stale until it is
+    SearchStaleFactor TTLs old, so the caller can use it while it refreshes.
+    Storage and LRU order are PersistentLRUCache's.
+    """
+
+    table = "entries"
+    schema = ("kind TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, freshness TEXT NOT NULL, "
+              "created REAL NOT NULL, ttl REAL NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (kind, key)")
+    key_columns = ("kind", "key")
+    value_columns = ("value", "freshness", "created", "ttl")
+    counters = ("hits", "stale_hits", "misses", "evictions")
+    served = ("hits", "stale_hits")
+
+    def __init__(self, db_path: str = SEARCH_CACHE_DB_PATH, max_entries: int = SearchCacheSize,
+                 stale_factor: float = SearchStaleFactor):
+        self.stale_factor = stale_factor
+        super().__init__(db_path, max_entries)
+
+    def _purge_condition(self, now: float):
+        return "created + ttl * ? < ?", (self.stale_factor, now)
+
+    def get(self, kind: str, query: str) -> Optional[Tuple[str, bool]]:
+        """(value, fresh) for query, or None when there is no usable entry."""
+        key = (kind, CacheKey(query))
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            age = now - entry["created"]
+            if age >= entry["ttl"] * self.stale_factor:
+                self._delete(key)
+                self.misses += 1
+                return None
+
+            fresh = age < entry["ttl"]
+            self._touch(key, now)
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry["value"], fresh
+
+    def put(self, kind: str, query: str, value: str):
+        freshness, ttl = Freshness(query)
+        key = (kind, CacheKey(query))
+        if ttl <= 0 or not key[1] or not value.strip():
+            return
+
+        now = time.time()
+        self._store(key, {"value": value, "freshness": freshness, "created": now, "ttl": ttl, "last_used": now})
+
+
+_cache: Optional[SearchCache] = None
+_cache_lock = threading.Lock()
+
+
+def GetSearchCache() -> SearchCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SearchCache()
+            atexit.register(_cache.save)
+        return _cache
@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from dotenv import dotenv_values
+from Backend.Chatbot import AnswerModifier, CachedAnswer, ChatBot, FallbackAnswer, GenerateAnswer, RecordAnswer
+
+env_vars = dotenv_values(".env")
+# Opt-in: start the ChatBot answer while FirstLayerDMM is still classifying the query
+SpeculativeAnswers = (env_vars.get("SpeculativeAnswers") or "False").strip().lower() in ("true", "1", "yes")
+
+
+class SpeculationMetrics:
+    """Counts of kept and discarded speculative answers and the tokens the discards cost."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.won = 0
+        self.lost = 0
+        self.failed = 0
+        self.wasted_prompt_tokens = 0
+        self.wasted_completion_tokens = 0
+
+    def record_start(self):
+        with self._lock:
+            self.started += 1
+
+    def record_win(self):
+        with self._lock:
+            self.won += 1
+
+    def record_loss(self, result: Optional[Dict]):
+        with self._lock:
+            self.lost += 1
+            if result is None:
+                self.failed += 1
+            else:
+                self.wasted_prompt_tokens += result["prompt_tokens"]
+                self.wasted_completion_tokens += result["completion_tokens"]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            resolved = self.won + self.lost
+            return {
+                "started": self.started,
+                "won": self.won,
+                "lost": self.lost,
+                "failed": self.failed,
+                "win_rate": self.won / resolved if resolved else 0.0,
+                "wasted_prompt_tokens": self.wasted_prompt_tokens,
+                "wasted_completion_tokens": self.wasted_completion_tokens,
+            }
+
+
+metrics = SpeculationMetrics()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="Speculation")
+
+
+class SpeculativeAnswer:
+    """A ChatBot completion started before the decision is known.
+
+    Exactly one of accept() or discard() should be called. accept() waits for
+    the answer and records it in the chat log as ChatBot would; discard()
+    stops the stream at the next chunk and nothing is recorded, and accept()
+    refuses to run afterwards. Tokens that arrive before accept() are
+    buffered and replayed to its on_token.
+    """
+
+    def __init__(self, query: str):
+        self.query = query
+        self._cancel = threading.Event()
+        self._resolved = False
+        self._tokens_lock = threading.Lock()
+        self._tokens = []
+        self._text = []
+        self._on_token = None
+        metrics.record_start()
+        self._future = _executor.submit(GenerateAnswer, query, self._cancel, self._forward)
+
+    def _forward(self, token: str):
+        with self._tokens_lock:
+            self._text.append(token)
+            if self._on_token is None:
+                self._tokens.append(token)
+                return
+        self._on_token(token)
+
+    @property
+    def discarded(self) -> bool:
+        return self._cancel.is_set()
+
+    def accept(self, on_token=None) -> str:
+        if self._resolved:
+            raise RuntimeError("Speculative answer was already discarded or accepted")
+        self._resolved = True
+        if on_token is not None:
+            with self._tokens_lock:
+                for token in self._tokens:
+                    on_token(token)
+                self._tokens = []
+                self._on_token = on_token
+        try:
+            result = self._future.result()
+        except Exception as e:
+            # The speculative call failed; ChatBot has the model fallback, unless part of the answer is already out
+            print(f"Error in speculative answer: {e}")
+            metrics.record_loss(None)
+            partial = "".join(self._text)
+            if partial:
+                return FallbackAnswer(self.query, partial, on_token)
+            return ChatBot(self.query, on_token)
+
+        if result["cancelled"]:
+            # Stopped part way, so the text is truncated; never record or cache it as an answer
+            metrics.record_loss(result)
+            if result["answer"]:
+                return FallbackAnswer(self.query, result["answer"], on_token)
+            return ChatBot(self.query, on_token)
+
+        metrics.record_win()
+        RecordAnswer(self.query, result["answer"])
+        return AnswerModifier(result["answer"])
+
+    def discard(self):
+        if self._resolved:
+            return
+        self._resolved = True
+        self._cancel.set()
+        self._future.add_done_callback(self._record_discard)
+
+    @staticmethod
+    def _record_discard(future):
+        try:
+            result = future.result()
+        except Exception:
+            result = None
+        metrics.record_loss(result)
+
+
+def StartSpeculation(query: str) -> Optional[SpeculativeAnswer]:
+    """Start a speculative answer for query, or None when speculation is disabled or the answer is cached."""
+    if not SpeculativeAnswers or CachedAnswer(query) is not None:
+        return None
+    return SpeculativeAnswer(query)
@@ -2,11 +2,12 @@ from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import dotenv_values
 import os
 import mtranslate as mt
-import time
+from Backend.StateBus import bus, STATUS
 
 # Load environment variables
 env_vars = dotenv_values(".env")
@@ -26,25 +27,55 @@ HtmlCode = """<!DOCTYPE html>
   <script>
     const output = document.getElementById('output');
     let recognition;
+    let listening = false;
+    // Results not yet collected by Python, and the callback of a waiting nextResult call
+    const results = [];
+    let waiter = null;
+
+    function deliver(text) {
+      if (waiter) {
+        const callback = waiter;
+        waiter = null;
+        callback(text);
+      } else {
+        results.push(text);
+      }
+    }
+
+    // Called through execute_async_script: answers with the next result as soon as there is one
+    window.nextResult = function(callback) {
+      if (results.length) {
+        callback(results.shift());
+      } else {
+        waiter = callback;
+      }
+    };
 
     function startRecognition() {
       recognition = new (window.SpeechRecognition || window.webkitSpeechRecognition)();
       recognition.lang = '';
       recognition.continuous = true;
+      listening = true;
 
       recognition.onresult = function(event) {
         const transcript = event.results[event.results.length - 1][0].transcript;
         output.textContent += transcript + " ";
+        if (transcript.trim()) {
+          deliver(output.textContent);
+        }
       };
 
       recognition.onend = function() {
-        recognition.start();
+        if (listening) {
+          recognition.start();
+        }
       };
 
       recognition.start();
     }
 
     function stopRecognition() {
+      listening = false;
       recognition.stop();
     }
   </script>
@@ -78,10 +109,9 @@ driver = webdriver.Chrome(service=service, options=chrome_options)
 TempDirPath = os.path.join(current_dir, "Frontend", "Files")
 os.makedirs(TempDirPath, exist_ok=True)
 
-# Function to write assistant status
+# Function to publish assistant status to the GUI
 def SetAssistantStatus(Status):
-    with open(os.path.join(TempDirPath, "Status.data"), "w", encoding='utf-8') as file:
-        file.write(Status)
+    bus.set(STATUS, Status)
 
 # Function to clean/modify query
 def QueryModifier(Query):
@@ -107,30 +137,31 @@ def SpeechRecognition(timeout=15):
     driver.find_element(By.ID, "start").click()
 
     print("[INFO] Listening... Speak now.")
-    start_time = time.time()
 
-    while True:
+    # The page calls back once per recognition result, so this blocks without polling
+    driver.set_script_timeout(timeout)
+    try:
+        Text = driver.execute_async_script("window.nextResult(arguments[arguments.length - 1]);")
+        driver.find_element(By.ID, "end").click()
+    except TimeoutException:
+        print("[WARN] Timeout reached. No input detected.")
         try:
-            Text = driver.find_element(By.ID, "output").text.strip()
-
-            if Text:
-                driver.find_element(By.ID, "end").click()
-                print(f"[INFO] Recognized text: {Text}")
-
-                if "en" in InputLanguage.lower():
-                    return QueryModifier(Text)
-                else:
-                    SetAssistantStatus("Translating...")
-                    return QueryModifier(UniversalTranslator(Text))
-
-            # Timeout condition
-            if time.time() - start_time > timeout:
-                driver.find_element(By.ID, "end").click()
-                print("[WARN] Timeout reached. No input detected.")
-                return None
-
-        except Exception:
-            pass
+            driver.find_element(By.ID, "end").click()
+        except WebDriverException as e:
+            print(f"[ERROR] Could not stop speech recognition: {e}")
+        return None
+    except WebDriverException as e:
+        print(f"[ERROR] Speech recognition failed: {e}")
+        return None
+
+    Text = (Text or "").strip()
+    print(f"[INFO] Recognized text: {Text}")
+
+    if "en" in InputLanguage.lower():
+        return QueryModifier(Text)
+    else:
+        SetAssistantStatus("Translating...")
+        return QueryModifier(UniversalTranslator(Text))
 
 # Main loop
 if __name__ == "__main__":
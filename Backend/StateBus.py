@@ -0,0 +1,60 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional
+
+# Keys shared between the voice thread, the automation module and the GUI
+STATUS = "status"
+MICROPHONE = "microphone"
+RESPONSES = "responses"
+# Text of the answer currently being generated, redrawn in place as tokens arrive
+STREAMING = "streaming"
+
+
+class StateBus:
+    """Thread-safe in-process key/value store that pushes every update to its subscribers."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._values: Dict[str, Any] = {}
+        self._subscribers: Dict[str, List[Callable[[Any], None]]] = defaultdict(list)
+
+    def get(self, key: str, default: Any = "") -> Any:
+        """Return the latest value published for key."""
+        with self._lock:
+            return self._values.get(key, default)
+
+    def set(self, key: str, value: Any):
+        """Store value and notify the subscribers of key."""
+        with self._lock:
+            self._values[key] = value
+            callbacks = list(self._subscribers[key])
+            self._changed.notify_all()
+
+        # Callbacks run outside the lock so a slow subscriber cannot block publishers
+        for callback in callbacks:
+            try:
+                callback(value)
+            except Exception as e:
+                print(f"StateBus subscriber error for '{key}': {e}")
+
+    def subscribe(self, key: str, callback: Callable[[Any], None]) -> Callable[[], None]:
+        """Register callback for updates to key and return a function that removes it."""
+        with self._lock:
+            self._subscribers[key].append(callback)
+
+        def unsubscribe():
+            with self._lock:
+                if callback in self._subscribers[key]:
+                    self._subscribers[key].remove(callback)
+
+        return unsubscribe
+
+    def wait_for(self, key: str, predicate: Callable[[Any], bool], timeout: Optional[float] = None) -> bool:
+        """Block until predicate holds for the value of key; returns False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: predicate(self._values.get(key, "")), timeout)
+
+
+# Process-wide bus used by the GUI helpers and the backend modules
+bus = StateBus()
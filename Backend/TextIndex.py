@@ -0,0 +1,71 @@
+import re
+import math
+import heapq
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+StopWords = {
+    "a", "an", "the", "me", "my", "you", "your", "i", "we", "us", "our", "he", "she", "they", "them",
+    "his", "her", "their", "it", "its", "about", "of", "on", "in", "at", "to", "for", "from", "by",
+    "with", "and", "or", "but", "is", "are", "was", "were", "be", "been", "do", "does", "did", "can",
+    "could", "would", "should", "will", "what", "who", "when", "where", "why", "how", "which", "that",
+    "this", "these", "those", "there", "here", "ago", "before", "earlier", "again", "please", "tell",
+    "just", "so", "if", "then", "than", "as", "not", "no", "yes", "some", "any", "all",
+}
+
+
+def Tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """Lowercase word tokens of text, optionally without stop words."""
+    words = _WORD_PATTERN.findall((text or "").lower())
+    if drop_stopwords:
+        return [word for word in words if word not in StopWords]
+    return words
+
+
+def Stem(word: str) -> str:
+    """Light suffix stripping ("dogs" -> "dog", "studies" -> "study"), without a possessive "'s"."""
+    word = re.sub(r"'s?$", "", word)
+    for suffix, replacement, minimum in (("ies", "y", 5), ("ing", "", 6), ("ed", "", 5), ("es", "", 5), ("s", "", 4)):
+        if word.endswith(suffix) and len(word) >= minimum and not word.endswith("ss"):
+            # "boxes" -> "box", but "engines" -> "engine" by the plain "s" rule
+            if suffix == "es" and not word[:-2].endswith(("s", "x", "z", "ch", "sh")):
+                continue
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+class BM25Index:
+    """In-memory Okapi BM25 over tokenized documents, for small collections that change rarely."""
+
+    def __init__(self, documents: List[List[str]], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        self.lengths = [len(document) for document in documents]
+        self.average_length = (sum(self.lengths) / self.size) if self.size else 0.0
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        for index, document in enumerate(documents):
+            for term, frequency in Counter(document).items():
+                self.postings[term].append((index, frequency))
+        self.idf = {
+            term: math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def scores(self, tokens: List[str]) -> Dict[int, float]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokens):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for index, frequency in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[index] / (self.average_length or 1))
+                scores[index] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+    def search(self, tokens: List[str], k: int = 5) -> List[Tuple[int, float]]:
+        """Indices and scores of the k best matching documents, best first."""
+        scores = self.scores(tokens)
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
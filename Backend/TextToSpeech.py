@@ -3,12 +3,44 @@ import random
 import asyncio
 import edge_tts
 import os
+import io
+import re
+import time
+import queue
+import threading
 from dotenv import dotenv_values
 
 # Load environment variables
 env_vars = dotenv_values(".env")
 AssistantVoice = env_vars.get("AssistantVoice")
 
+ContinuationNotices = [
+    "The rest of the result has been printed to the chat screen, kindly check it out sir.",
+    "The rest of the text is now on the chat screen, sir, please check it.",
+    "You can see the rest of the text on the chat screen, sir.",
+    "The remaining part of the text is now on the chat screen, sir.",
+    "Sir, you'll find more text on the chat screen for you to see.",
+    "The rest of the answer is now on the chat screen, sir.",
+    "Sir, please look at the chat screen, the rest of the answer is there.",
+    "You'll find the complete answer on the chat screen, sir.",
+    "The next part of the text is on the chat screen, sir.",
+    "Sir, please check the chat screen for more information.",
+    "There's more text on the chat screen for you, sir.",
+    "Sir, take a look at the chat screen for additional text.",
+    "You'll find more to read on the chat screen, sir.",
+    "Sir, check the chat screen for the rest of the text.",
+    "The chat screen has the rest of the text, sir.",
+    "There's more to see on the chat screen, sir, please look.",
+    "Sir, the chat screen holds the continuation of the text.",
+    "You'll find the complete answer on the chat screen, kindly check it out sir.",
+    "Please review the chat screen for the rest of the text, sir.",
+    "Sir, look at the chat screen for the complete answer."
+]
+
+# A sentence ends at . ! ? (plus closing quotes or brackets) followed by whitespace, or at a line break
+SentenceEnd = re.compile(r"[.!?]+[\"')\]]*\s+|\n+")
+Abbreviations = {"mr", "mrs", "ms", "dr", "st", "sr", "jr", "vs", "etc", "e.g", "i.e", "no", "fig"}
+
 # Async function to convert text to audio and save as mp3
 async def TextToAudioFile(text) -> None:
     file_path = r"Data\speech.mp3"
@@ -54,38 +86,180 @@ def TTS(Text, func=lambda r=None: True):
             except Exception as e:
                 print(f"Error in finally block: {e}")
 
+def IsLongAnswer(Text):
+    return len(str(Text).split(".")) > 4 and len(Text) >= 250
+
+
 # Function to manage long text and chunking
 def TextToSpeech(Text, func=lambda r=None: True):
-    Data = str(Text).split(".")
-
-    responses = [
-        "The rest of the result has been printed to the chat screen, kindly check it out sir.",
-        "The rest of the text is now on the chat screen, sir, please check it.",
-        "You can see the rest of the text on the chat screen, sir.",
-        "The remaining part of the text is now on the chat screen, sir.",
-        "Sir, you'll find more text on the chat screen for you to see.",
-        "The rest of the answer is now on the chat screen, sir.",
-        "Sir, please look at the chat screen, the rest of the answer is there.",
-        "You'll find the complete answer on the chat screen, sir.",
-        "The next part of the text is on the chat screen, sir.",
-        "Sir, please check the chat screen for more information.",
-        "There's more text on the chat screen for you, sir.",
-        "Sir, take a look at the chat screen for additional text.",
-        "You'll find more to read on the chat screen, sir.",
-        "Sir, check the chat screen for the rest of the text.",
-        "The chat screen has the rest of the text, sir.",
-        "There's more to see on the chat screen, sir, please look.",
-        "Sir, the chat screen holds the continuation of the text.",
-        "You'll find the complete answer on the chat screen, kindly check it out sir.",
-        "Please review the chat screen for the rest of the text, sir.",
-        "Sir, look at the chat screen for the complete answer."
-    ]
-
-    if len(Data) > 4 and len(Text) >= 250:
-        TTS(" ".join(Text.split(".")[0:2]) + ". " + random.choice(responses), func)
+    if IsLongAnswer(Text):
+        TTS(" ".join(Text.split(".")[0:2]) + ". " + random.choice(ContinuationNotices), func)
     else:
         TTS(Text, func)
 
+
+class SentenceSplitter:
+    """Cuts streamed text into sentences as soon as each one is complete."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, text):
+        self.buffer += text
+        sentences = []
+        start = 0
+        for match in SentenceEnd.finditer(self.buffer):
+            sentence = self.buffer[start:match.end()].strip()
+            words = sentence.rstrip(".!?\"')]").split()
+            # "Dr. Kalam" or "1. First" does not end a sentence
+            if words and match.group().startswith(".") and (
+                    words[-1].lower() in Abbreviations or (len(words[-1]) == 1 and len(words) == 1)):
+                continue
+            if sentence:
+                sentences.append(sentence)
+            start = match.end()
+        self.buffer = self.buffer[start:]
+        return sentences
+
+    def flush(self):
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest
+
+
+# Synthesize one sentence in memory
+async def SynthesizeSentence(text) -> bytes:
+    communication = edge_tts.Communicate(
+        text,
+        AssistantVoice,
+        pitch='+5Hz',
+        rate='+13%'
+    )
+    audio = bytearray()
+    async for chunk in communication.stream():
+        if chunk["type"] == "audio":
+            audio.extend(chunk["data"])
+    return bytes(audio)
+
+
+class SpeechStream:
+    """Speaks text sentence by sentence while it is still being generated.
+
+    feed() takes tokens as they stream in; each completed sentence goes to a
+    synthesis thread, and a playback thread plays the audio in order, so the
+    next sentence is synthesized while the current one plays. Long answers
+    are shortened like TextToSpeech does: the first two sentences are spoken
+    and the rest replaced by a pointer to the chat screen. Call close() when
+    the text is complete and wait() to block until playback ends.
+    """
+
+    def __init__(self, func=lambda r=None: True, on_start=None):
+        self.func = func
+        self.on_start = on_start
+        self.first_audio_at = None
+        self._splitter = SentenceSplitter()
+        self._text = ""
+        self._queued = 0
+        self._held = []
+        self._truncated = False
+        self._closed = False
+        self._stopped = threading.Event()
+        self._sentences = queue.Queue()
+        self._audio = queue.Queue()
+        self._synthesizer = threading.Thread(target=self._synthesize, name="SpeechSynthesis", daemon=True)
+        self._player = threading.Thread(target=self._play, name="SpeechPlayback", daemon=True)
+        self._synthesizer.start()
+        self._player.start()
+
+    def feed(self, text):
+        if self._closed:
+            return
+        self._text += text
+        for sentence in self._splitter.feed(text):
+            self._queue_sentence(sentence)
+
+    def _queue_sentence(self, sentence):
+        if self._queued < 2:
+            self._queued += 1
+            self._sentences.put(sentence)
+        elif self._truncated:
+            return
+        elif IsLongAnswer(self._text):
+            self._truncate()
+        else:
+            # Only spoken if the answer stays short
+            self._held.append(sentence)
+
+    def _truncate(self):
+        self._truncated = True
+        self._held = []
+        self._sentences.put(random.choice(ContinuationNotices))
+
+    def close(self):
+        if self._closed:
+            return
+        rest = self._splitter.flush()
+        if rest:
+            self._queue_sentence(rest)
+        if not self._truncated:
+            if IsLongAnswer(self._text) and self._held:
+                self._truncate()
+            for sentence in self._held:
+                self._sentences.put(sentence)
+        self._closed = True
+        self._sentences.put(None)
+
+    def stop(self):
+        self._stopped.set()
+        self.close()
+
+    def wait(self, timeout=None):
+        self._player.join(timeout)
+
+    def _synthesize(self):
+        while True:
+            sentence = self._sentences.get()
+            if sentence is None or self._stopped.is_set():
+                self._audio.put(None)
+                return
+            try:
+                self._audio.put(asyncio.run(SynthesizeSentence(sentence)))
+            except Exception as e:
+                print(f"Error in TTS: {e}")
+
+    def _play(self):
+        try:
+            pygame.mixer.init()
+            while True:
+                audio = self._audio.get()
+                if audio is None:
+                    break
+                if self._stopped.is_set() or not audio:
+                    continue
+
+                pygame.mixer.music.load(io.BytesIO(audio), "mp3")
+                pygame.mixer.music.play()
+                if self.first_audio_at is None:
+                    self.first_audio_at = time.perf_counter()
+                    if self.on_start is not None:
+                        self.on_start()
+
+                while pygame.mixer.music.get_busy():
+                    if self.func() == False:
+                        self._stopped.set()
+                        break
+                    pygame.time.Clock().tick(10)
+
+        except Exception as e:
+            print(f"Error in TTS playback: {e}")
+
+        finally:
+            try:
+                self.func(False)
+                pygame.mixer.music.stop()
+                pygame.mixer.quit()
+            except Exception as e:
+                print(f"Error in finally block: {e}")
+
 # Print selected voice
 print("Using voice:", AssistantVoice)
 
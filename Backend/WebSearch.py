@@ -0,0 +1,275 @@
+import re
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Callable, List, NamedTuple, Optional
+
+import httpx
+from dotenv import dotenv_values
+from Backend.ContextWindow import CountTokens
+from Backend.TextIndex import BM25Index, Tokenize
+
+env_vars = dotenv_values(".env")
+SearchResults = int(env_vars.get("SearchResults") or 5)
+# Per page fetch, and the whole search-and-extract stage
+FetchTimeout = float(env_vars.get("FetchTimeout") or 2.5)
+SearchDeadline = float(env_vars.get("SearchDeadline") or 4)
+SearchTokenBudget = int(env_vars.get("SearchTokenBudget") or 800)
+SearchPassages = int(env_vars.get("SearchPassages") or 6)
+MaxPageBytes = 512 * 1024
+PassageWords = 80
+
+SentenceEnd = re.compile(r"(?<=[.!?])\s+")
+
+# Runs the blocking search call. asyncio.run() joins its default executor on the way out, which
+# would make a search past the deadline hold the stage up anyway; this pool is never joined.
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="SearchStage")
+
+UserAgent = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+
+class SearchResult(NamedTuple):
+    url: str
+    title: str
+    description: str
+    # Full text when the backend already has it (local documents); the page is not fetched then
+    content: str = ""
+
+
+class Passage(NamedTuple):
+    text: str
+    title: str
+    url: str
+
+
+class NoSearchResults(LookupError):
+    """The search found nothing to ground an answer on."""
+
+
+def GoogleResults(query: str, num_results: int = SearchResults) -> List[SearchResult]:
+    from googlesearch import search
+    return [SearchResult(result.url, result.title or "", result.description or "")
+            for result in search(query, advanced=True, num_results=num_results)]
+
+
+class TextExtractor(HTMLParser):
+    """Incremental main-text extractor: feed() HTML as it downloads, read paragraphs() at any point.
+
+    Text inside scripts, styles, navigation, headers, footers, forms and
+    asides is dropped; block elements end a paragraph. Fragments shorter
+    than a few words (menus, buttons, captions) are not kept.
+    """
+
+    SKIP = {"script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form",
+            "button", "select", "iframe"}
+    BLOCKS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "br", "tr", "td", "th", "table",
+              "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "dd", "dt", "figcaption"}
+    VOID = {"br", "img", "hr", "meta", "link", "input", "source", "wbr"}
+    MIN_WORDS = 6
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = ""
+        self._in_title = False
+        self._skip_depth = 0
+        self._stack: List[str] = []
+        self._current: List[str] = []
+        self._paragraphs: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.BLOCKS:
+            self._end_paragraph()
+        if tag in self.VOID:
+            return
+        if tag == "title":
+            self._in_title = True
+        if tag in self.SKIP:
+            self._skip_depth += 1
+        self._stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in self.BLOCKS:
+            self._end_paragraph()
+        if tag not in self._stack:
+            return
+        # Close anything left open inside tag, as browsers do
+        while self._stack:
+            open_tag = self._stack.pop()
+            if open_tag in self.SKIP:
+                self._skip_depth -= 1
+            if open_tag == "title":
+                self._in_title = False
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip_depth:
+            self._current.append(data)
+
+    def _end_paragraph(self):
+        text = re.sub(r"\s+", " ", "".join(self._current)).strip()
+        self._current = []
+        if len(text.split()) >= self.MIN_WORDS:
+            self._paragraphs.append(text)
+
+    def paragraphs(self) -> List[str]:
+        self._end_paragraph()
+        return list(self._paragraphs)
+
+
+def SplitPassages(paragraphs: List[str], words: int = PassageWords) -> List[str]:
+    """Merge short paragraphs and split long ones at sentence ends into passages of about words words."""
+    passages, current = [], []
+    for paragraph in paragraphs:
+        for sentence in SentenceEnd.split(paragraph):
+            current.append(sentence)
+            if sum(len(part.split()) for part in current) >= words:
+                passages.append(" ".join(current))
+                current = []
+        # Keep a long paragraph's tail apart from the next paragraph
+        if current and sum(len(part.split()) for part in current) >= words // 2:
+            passages.append(" ".join(current))
+            current = []
+    if current:
+        passages.append(" ".join(current))
+    return passages
+
+
+def RankPassages(query: str, passages: List[Passage], token_budget: int = SearchTokenBudget,
+                 limit: int = SearchPassages, overlap: float = 0.8) -> List[Passage]:
+    """Best passages for query by BM25 within token_budget, skipping any mostly contained in a better one."""
+    tokens = [Tokenize(passage.text) for passage in passages]
+    index = BM25Index(tokens)
+    ranked = sorted(index.scores(Tokenize(query)).items(), key=lambda item: -item[1])
+    if not ranked:
+        # Nothing to rank on (e.g. only stop words); keep search order
+        ranked = [(position, 0.0) for position in range(len(passages))]
+
+    chosen, chosen_words, used = [], [], 0
+    for position, _ in ranked:
+        words = set(tokens[position])
+        if len(chosen) == limit:
+            break
+        if any(len(words & other) >= overlap * min(len(words), len(other)) for other in chosen_words):
+            continue
+        cost = CountTokens(passages[position].text)
+        if used + cost > token_budget:
+            continue
+        chosen.append(passages[position])
+        chosen_words.append(words)
+        used += cost
+    return chosen
+
+
+class SearchStage:
+    """Search, fetch the result pages concurrently, and keep the passages that best answer the query.
+
+    Each page is streamed through a TextExtractor with its own FetchTimeout;
+    a page that is still downloading when its time is up contributes what
+    was parsed so far. The search result snippets are ranked alongside the
+    page passages, so the context is never worse than the snippets alone.
+    search is any callable (query, num_results) -> List[SearchResult], such
+    as a Backend.SearchBackend, and
+    transport an optional httpx transport, so the stage can run against
+    local fixtures.
+    """
+
+    def __init__(self, search: Callable[[str, int], List[SearchResult]] = GoogleResults,
+                 num_results: int = SearchResults, fetch_timeout: float = FetchTimeout,
+                 deadline: float = SearchDeadline, token_budget: int = SearchTokenBudget,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.search = search
+        self.num_results = num_results
+        self.fetch_timeout = fetch_timeout
+        self.deadline = deadline
+        self.token_budget = token_budget
+        self.transport = transport
+
+    async def _fetch(self, client: httpx.AsyncClient, result: SearchResult,
+                     extractor: Optional[TextExtractor] = None) -> List[str]:
+        """Paragraphs of result's page, as far as it could be read within fetch_timeout.
+
+        The caller may pass its own extractor to read what was parsed if the
+        fetch is cancelled.
+        """
+        if result.content:
+            return [paragraph.strip() for paragraph in result.content.split("\n\n") if paragraph.strip()]
+        extractor = extractor if extractor is not None else TextExtractor()
+
+        async def read():
+            async with client.stream("GET", result.url) as response:
+                response.raise_for_status()
+                if "html" not in response.headers.get("content-type", "text/html"):
+                    return
+                received = 0
+                async for chunk in response.aiter_text():
+                    extractor.feed(chunk)
+                    received += len(chunk)
+                    if received >= MaxPageBytes:
+                        return
+
+        try:
+            await asyncio.wait_for(read(), self.fetch_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except httpx.HTTPStatusError as e:
+            print(f"Error fetching {result.url}: HTTP {e.response.status_code}")
+        except Exception as e:
+            print(f"Error fetching {result.url}: {e}")
+
+        return extractor.paragraphs()
+
+    async def gather_async(self, query: str) -> List[Passage]:
+        start = time.monotonic()
+        loop = asyncio.get_running_loop()
+        results = await asyncio.wait_for(
+            loop.run_in_executor(_search_executor, self.search, query, self.num_results), self.deadline
+        )
+        if not results:
+            return []
+        extractors = [TextExtractor() for _ in results]
+        async with httpx.AsyncClient(transport=self.transport, follow_redirects=True,
+                                     headers={"User-Agent": UserAgent},
+                                     timeout=httpx.Timeout(self.fetch_timeout)) as client:
+            tasks = [asyncio.ensure_future(self._fetch(client, result, extractor))
+                     for result, extractor in zip(results, extractors)]
+            remaining = max(0.1, self.deadline - (time.monotonic() - start))
+            done, pending = await asyncio.wait(tasks, timeout=remaining)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        passages, seen = [], set()
+        for result, task, extractor in zip(results, tasks, extractors):
+            # A page cut off by the stage deadline still gives what was parsed so far
+            paragraphs = task.result() if task in done else extractor.paragraphs()
+            if not paragraphs and result.description:
+                # The snippet stands in for a page that failed or timed out
+                paragraphs = [result.description]
+            # Sentences are often syndicated across results; keep the first copy, from the better result
+            unseen = []
+            for paragraph in paragraphs:
+                sentences = [sentence for sentence in SentenceEnd.split(paragraph) if sentence.lower() not in seen]
+                seen.update(sentence.lower() for sentence in sentences)
+                if sentences:
+                    unseen.append(" ".join(sentences))
+            passages.extend(Passage(text, result.title, result.url) for text in SplitPassages(unseen))
+
+        return RankPassages(query, passages, self.token_budget)
+
+    def gather(self, query: str) -> List[Passage]:
+        return asyncio.run(self.gather_async(query))
+
+    def context(self, query: str) -> str:
+        """System prompt block with the best passages for query; raises NoSearchResults when there are none."""
+        passages = self.gather(query)
+        if not passages:
+            raise NoSearchResults(f"No search results for {query!r}")
+        Answer = f"Use the following data for answering the query '{query}':\n[start]\n"
+        for passage in passages:
+            Answer += f"Source: {passage.title} ({passage.url})\n{passage.text}\n\n"
+        Answer += "[end]"
+        return Answer
@@ -0,0 +1,16 @@
+"""Helpers shared by the benchmark and evaluation scripts."""
+from typing import Dict, List, Sequence
+
+from Backend.ContextWindow import CountTokens, MESSAGE_OVERHEAD_TOKENS
+
+
+def Percentile(values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of values (fraction 0-1), NaN when there are none."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] if ordered else float("nan")
+
+
+def PromptTokens(system_preamble: str, chat_history: List[Dict], query: str) -> int:
+    """Estimated tokens of a Cohere prompt: preamble, {"message": ...} history and query."""
+    history = sum(CountTokens(message["message"]) + MESSAGE_OVERHEAD_TOKENS for message in chat_history)
+    return CountTokens(system_preamble) + history + CountTokens(query) + MESSAGE_OVERHEAD_TOKENS
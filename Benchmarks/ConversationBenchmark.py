@@ -0,0 +1,107 @@
+"""Chat log writes and prompt size over a conversation with Backend.Chatbot against the mock server.
+
+ChatBot answers --turns distinct questions through Benchmarks.MockLLMServer,
+with its chat log, memory and answer cache in a temporary directory. After
+every turn the run checks that the turn added exactly one user and one
+assistant row to the chat log, and that the prompt Groq received held the
+current question once and no earlier turn twice. The context builder is
+fed the real ChatLogService output with --verbatim-turns turns kept as-is,
+so the run also checks that those are exactly the latest turns in the log
+and that the rolling summary folds every older turn once. It exits
+non-zero when a check fails, so it doubles as a regression check.
+
+Run from the project root:
+    python -m Benchmarks.ConversationBenchmark [--turns 12] [--verbatim-turns 3]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from collections import Counter
+
+import Backend.Chatbot as Chatbot
+from Backend.AnswerCache import AnswerCache
+from Backend.ChatLogStore import ChatLogService, ChatLogStore
+from Backend.ContextWindow import ContextBuilder, CountMessageTokens
+from Backend.LLMGateway import LLMGateway
+from Backend.Memory import ConversationMemory
+from Benchmarks.MockLLMServer import MockLLMServer
+
+Questions = [
+    "What is photosynthesis?", "Who was Alonzo Church?", "How does a jet engine work?",
+    "What is lambda calculus?", "Why is the sky blue?", "What is a black hole?",
+    "Who painted the Mona Lisa?", "What is a neural network?", "How do vaccines work?",
+    "What is the French Revolution known for?", "What is quantum computing?", "How is tea made?",
+]
+
+
+def TurnProblems(rows, before, question, prompt, verbatim_turns):
+    """What is wrong with the turn that added rows[before:] and sent prompt, as a list of messages."""
+    problems = []
+    added = [row["role"] for row in rows[before:]]
+    if added != ["user", "assistant"]:
+        problems.append(f"chat log rows added {added}, expected ['user', 'assistant']")
+    asked = Counter(message["content"] for message in prompt if message["role"] == "user")
+    if asked[question] != 1:
+        problems.append(f"question sent {asked[question]} times")
+    repeated = [content for content, count in asked.items() if count > 1 and content != question]
+    if repeated:
+        problems.append(f"earlier turns repeated in the prompt: {repeated}")
+
+    # The verbatim window is the tail of the log as it was before this turn
+    window = [{"role": message["role"], "content": message["content"]}
+              for message in prompt[:-1] if message["role"] != "system"]
+    expected = [{"role": row["role"], "content": row["content"]} for row in rows[:before][-verbatim_turns * 2:]]
+    if window != expected:
+        problems.append(f"verbatim window differs from the last {len(expected)} log rows")
+
+    summary = next((message["content"] for message in prompt if message["role"] == "system"
+                    and message["content"].startswith("Summary of the earlier conversation")), "")
+    points = [line for line in summary.split("\n")[1:] if line.strip()]
+    if len(points) != len(set(points)):
+        problems.append("summary folds some turns twice")
+    return problems
+
+
+def Run(turns: int, verbatim_turns: int):
+    questions = [Questions[index % len(Questions)] + ("" if index < len(Questions) else f" ({index})")
+                 for index in range(turns)]
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory, \
+            MockLLMServer(latency=0.01, jitter=0.0, chunk_delay=0.0) as mock:
+        chat_log = ChatLogService(ChatLogStore(os.path.join(directory, "ChatLog.db"), legacy_path=None))
+        Chatbot.chat_log = chat_log
+        Chatbot.memory = ConversationMemory(os.path.join(directory, "Memory.db"))
+        Chatbot.answer_cache = AnswerCache(os.path.join(directory, "AnswerCache.db"))
+        Chatbot.context_builder = ContextBuilder(token_budget=Chatbot.ContextTokenBudget, verbatim_turns=verbatim_turns)
+        Chatbot.gateway = LLMGateway(groq_api_key="mock", cohere_api_key="mock",
+                                     groq_base_url=mock.url, cohere_base_url=mock.url)
+
+        print(f"# {turns} ChatBot turns against the mock server\n")
+        print("| Turn | Log rows | Prompt messages | Prompt tokens | Problems |")
+        print("|---|---|---|---|---|")
+        for turn, question in enumerate(questions, 1):
+            chat_log.flush()
+            before = len(chat_log.store.tail(None))
+            Chatbot.ChatBot(question)
+            chat_log.flush()
+            rows = chat_log.store.tail(None)
+            prompt = mock.prompts[-1]
+            problems = TurnProblems(rows, before, question, prompt, verbatim_turns)
+            failures += bool(problems)
+            print(f"| {turn} | {len(rows)} | {len(prompt)} | {CountMessageTokens(prompt)} | "
+                  f"{'; '.join(problems) or '-'} |")
+
+        Chatbot.gateway.close()
+        chat_log.close()
+
+    print(f"\n{turns - failures}/{turns} turns passed")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=12)
+    parser.add_argument("--verbatim-turns", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(1 if Run(args.turns, args.verbatim_turns) else 0)
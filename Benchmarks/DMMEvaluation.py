@@ -0,0 +1,139 @@
+"""Routing accuracy, latency and token cost of FirstLayerDMM over a labelled dataset.
+
+Every query in the dataset (Data/DMMEvaluation.jsonl by default, seeded from
+the queries in Data/assistant.log with hand-corrected labels) is sent to
+Cohere through DecisionEngine.decide_batch, bypassing the local fast path,
+decision cache and router. Precision and recall are per label category, so
+"open chrome" and "open chrome." count the same. Tokens are local estimates
+of the prompt and reply.
+
+The local fast path (Backend.LocalDMM) is checked on the same dataset
+first: every query it would answer without the LLM must get the expected
+categories. The "negative" examples are the ones it must leave alone
+("close your eyes", "play a game with me").
+
+By default the queries go to a local stand-in Cohere server
+(Benchmarks.MockLLMServer), which checks the transport, streaming parser,
+retries and concurrency offline. The quality numbers only mean something
+with --live, which uses CohereAPIKey from .env.
+
+Run from the project root:
+    python -m Benchmarks.DMMEvaluation [--live] [--concurrency 8] [--static-prompt]
+"""
+import json
+import time
+import argparse
+import statistics
+from collections import Counter
+
+from Backend.ContextWindow import CountTokens
+from Backend.Model import DecisionEngine
+from Backend.LLMGateway import LLMGateway
+from Backend.LocalDMM import FastPathThreshold, LocalDMM
+from Backend.Router import LabelCategory
+from Benchmarks.Common import Percentile, PromptTokens
+from Benchmarks.MockLLMServer import MockLLMServer
+
+DATASET_PATH = "Data/DMMEvaluation.jsonl"
+
+
+def LoadDataset(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def Report(dataset, results, engine: DecisionEngine, elapsed: float):
+    true_positives, predicted, expected = Counter(), Counter(), Counter()
+    exact = 0
+    for example, (labels, _) in zip(dataset, results):
+        want = {LabelCategory(label) for label in example["labels"]}
+        got = {LabelCategory(label) for label in labels}
+        exact += want == got
+        for category in want:
+            expected[category] += 1
+        for category in got:
+            predicted[category] += 1
+            true_positives[category] += category in want
+
+    latencies = [seconds * 1000 for _, seconds in results]
+    input_tokens = [PromptTokens(*engine.prompt_for(example["query"]), example["query"]) for example in dataset]
+    output_tokens = [CountTokens(", ".join(labels)) for labels, _ in results]
+
+    print(f"Queries: {len(dataset)}; all categories correct: {exact / len(dataset):.1%}; "
+          f"throughput: {len(dataset) / elapsed:.1f} queries/s\n")
+    print("| Category | Precision | Recall | Support |")
+    print("|---|---|---|---|")
+    for category in sorted(set(expected) | set(predicted), key=str):
+        precision = true_positives[category] / predicted[category] if predicted[category] else 0.0
+        recall = true_positives[category] / expected[category] if expected[category] else 0.0
+        print(f"| {category} | {precision:.2f} | {recall:.2f} | {expected[category]} |")
+
+    print(f"\nLatency p50 / p95: {statistics.median(latencies):.0f} / {Percentile(latencies, 0.95):.0f} ms")
+    print(f"Input tokens mean / total: {statistics.mean(input_tokens):.0f} / {sum(input_tokens)}")
+    print(f"Output tokens mean / total: {statistics.mean(output_tokens):.1f} / {sum(output_tokens)}")
+    print(f"Engine stats: {engine.stats()}; gateway stats: {engine.gateway.stats()}")
+
+    misses = [(example["query"], example["labels"], labels) for example, (labels, _) in zip(dataset, results)
+              if {LabelCategory(label) for label in example["labels"]} != {LabelCategory(label) for label in labels}]
+    if misses:
+        print("\nMisrouted:")
+        for query, want, got in misses:
+            print(f"  {query!r}: expected {want}, got {got}")
+
+
+def LocalReport(dataset):
+    """Print how often the local fast path answers and where it gets the categories wrong; returns the mistakes."""
+    taken, mistakes = 0, []
+    for example in dataset:
+        labels, confidence = LocalDMM(example["query"])
+        if not labels or confidence < FastPathThreshold:
+            continue
+        taken += 1
+        if {LabelCategory(label) for label in labels} != {LabelCategory(label) for label in example["labels"]}:
+            mistakes.append((example["query"], example["labels"], labels, confidence))
+
+    print(f"# Local fast path\n\nTaken for {taken}/{len(dataset)} queries, wrong for {len(mistakes)}")
+    for query, want, got, confidence in mistakes:
+        print(f"  {query!r}: expected {want}, got {got} at {confidence:.2f}")
+    print()
+    return mistakes
+
+
+def Run(args):
+    dataset = LoadDataset(args.dataset)
+    LocalReport(dataset)
+    queries = [example["query"] for example in dataset]
+
+    mock = None
+    if args.live:
+        gateway = LLMGateway()
+    else:
+        mock = MockLLMServer(latency=args.mock_latency, error_rate=args.mock_error_rate, seed=0).start()
+        gateway = LLMGateway(groq_api_key="mock", cohere_api_key="mock",
+                             groq_base_url=mock.url, cohere_base_url=mock.url)
+
+    try:
+        engine = DecisionEngine(gateway=gateway, dynamic_few_shot=not args.static_prompt, use_local=False)
+        start = time.perf_counter()
+        results = engine.decide_batch(queries, concurrency=args.concurrency)
+        elapsed = time.perf_counter() - start
+    finally:
+        gateway.close()
+        if mock is not None:
+            mock.stop()
+
+    target = "Cohere" if args.live else f"mock server ({mock.requests} requests, {mock.errors} injected errors)"
+    prompt = "static preamble" if args.static_prompt else "dynamic few-shot"
+    print(f"# FirstLayerDMM evaluation against {target}, {prompt}\n")
+    Report(dataset, results, engine, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", default=DATASET_PATH)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--live", action="store_true", help="send the queries to Cohere instead of the mock server")
+    parser.add_argument("--static-prompt", action="store_true", help="use the full preamble and fixed examples")
+    parser.add_argument("--mock-latency", type=float, default=0.3)
+    parser.add_argument("--mock-error-rate", type=float, default=0.0)
+    Run(parser.parse_args())
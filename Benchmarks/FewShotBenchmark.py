@@ -0,0 +1,73 @@
+"""Input tokens and latency of the DMM prompt: static preamble vs. dynamic few-shot.
+
+Token counts use the local estimator from Backend.ContextWindow, so they are
+comparable between the two prompts rather than exact Cohere token counts.
+With --live both prompts are also sent to Cohere for every query (needs
+CohereAPIKey in .env) and the end-to-end latency and label agreement are
+reported.
+
+Run from the project root:
+    python -m Benchmarks.FewShotBenchmark [--live]
+"""
+import time
+import argparse
+import statistics
+
+from Backend.Model import ChatHistory, DecisionEngine, FewShotExamples
+from Backend.Router import LoadLoggedDecisions
+from Benchmarks.Common import Percentile, PromptTokens
+
+DefaultQueries = [
+    "who is the prime minister of japan?", "open notepad and play lofi on spotify", "write an essay on pollution",
+    "what's the weather like in mumbai right now?", "mute the volume", "remind me to call mom at 7 pm",
+]
+
+
+def Run(live: bool):
+    queries = list(dict.fromkeys([query for query, _ in LoadLoggedDecisions()] + DefaultQueries))
+    static = DecisionEngine(dynamic_few_shot=False, use_local=False)
+    dynamic = DecisionEngine(dynamic_few_shot=True, use_local=False)
+    if dynamic.example_bank is None:
+        raise SystemExit("Data/DMMExamples.jsonl could not be loaded")
+
+    static_tokens, dynamic_tokens, selection_ms = [], [], []
+    for query in queries:
+        static_tokens.append(PromptTokens(*static.prompt_for(query), query))
+        start = time.perf_counter()
+        system_preamble, chat_history = dynamic.prompt_for(query)
+        selection_ms.append((time.perf_counter() - start) * 1000)
+        dynamic_tokens.append(PromptTokens(system_preamble, chat_history, query))
+
+    print("# DMM prompt: static vs. dynamic few-shot\n")
+    print(f"Queries: {len(queries)}; static examples: {len(ChatHistory) // 2}; dynamic examples: {FewShotExamples} "
+          f"of {len(dynamic.example_bank.examples)}\n")
+    print("| Metric | Static | Dynamic |")
+    print("|---|---|---|")
+    print(f"| Input tokens (mean) | {statistics.mean(static_tokens):.0f} | {statistics.mean(dynamic_tokens):.0f} |")
+    print(f"| Input tokens (max) | {max(static_tokens)} | {max(dynamic_tokens)} |")
+    print(f"| Example selection p50 / p95 | - | {statistics.median(selection_ms):.3f} / {Percentile(selection_ms, 0.95):.3f} ms |")
+
+    if not live:
+        return
+
+    latencies = {"static": [], "dynamic": []}
+    agree = 0
+    for query in queries:
+        labels = {}
+        for name, engine in (("static", static), ("dynamic", dynamic)):
+            start = time.perf_counter()
+            labels[name] = engine.decide(query)
+            latencies[name].append((time.perf_counter() - start) * 1000)
+        agree += labels["static"] == labels["dynamic"]
+        print(f"  {query!r}: {labels['static']} | {labels['dynamic']}")
+
+    print(f"\n| Cohere latency p50 | {statistics.median(latencies['static']):.0f} ms | {statistics.median(latencies['dynamic']):.0f} ms |")
+    print(f"| Cohere latency p95 | {Percentile(latencies['static'], 0.95):.0f} ms | {Percentile(latencies['dynamic'], 0.95):.0f} ms |")
+    print(f"| Same labels as static | reference | {agree / len(queries):.1%} |")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="also send both prompts to Cohere")
+    args = parser.parse_args()
+    Run(args.live)
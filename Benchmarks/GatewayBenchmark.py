@@ -0,0 +1,87 @@
+"""Connection reuse, concurrency caps and retries of Backend.LLMGateway against the mock server.
+
+Three runs against Benchmarks.MockLLMServer's Groq endpoint:
+  cold     a new gateway (so a new connection) for every request
+  pooled   one pre-warmed gateway reused for every request
+  burst    --burst requests at once through the per-provider cap, with
+           --error-rate of them answered 429/503 and retried
+The mock serves plain HTTP on localhost, so the cold/pooled gap here is only
+TCP setup; against the real APIs it also includes DNS and the TLS handshake.
+
+Run from the project root:
+    python -m Benchmarks.GatewayBenchmark [--requests 30] [--burst 24] [--error-rate 0.2]
+"""
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from Backend.LLMGateway import GROQ, LLMGateway
+from Benchmarks.Common import Percentile
+from Benchmarks.MockLLMServer import MockLLMServer
+
+Messages = [{"role": "user", "content": "what is photosynthesis?"}]
+
+
+def NewGateway(url, concurrency=4):
+    return LLMGateway(groq_api_key="mock", cohere_api_key="mock", groq_base_url=url, cohere_base_url=url,
+                      concurrency={GROQ: concurrency, "cohere": concurrency})
+
+
+def FirstTokenMs(gateway) -> float:
+    start = time.perf_counter()
+    stream = gateway.groq_stream(model="llama3-70b-8192", messages=Messages)
+    next(stream)
+    elapsed = (time.perf_counter() - start) * 1000
+    for _ in stream:
+        pass
+    return elapsed
+
+
+def Run(requests: int, burst: int, error_rate: float, concurrency: int):
+    with MockLLMServer(latency=0.05, jitter=0.0, chunk_delay=0.001) as mock:
+        cold = []
+        for _ in range(requests):
+            gateway = NewGateway(mock.url)
+            cold.append(FirstTokenMs(gateway))
+            gateway.close()
+        cold_connections = mock.connections
+
+        gateway = NewGateway(mock.url)
+        gateway.prewarm(wait=True)
+        pooled = [FirstTokenMs(gateway) for _ in range(requests)]
+        pooled_connections = mock.connections - cold_connections
+        gateway.close()
+
+    with MockLLMServer(latency=0.1, jitter=0.02, chunk_delay=0.001, error_rate=error_rate, seed=0) as mock:
+        gateway = NewGateway(mock.url, concurrency)
+        start = time.perf_counter()
+        failures = 0
+        with ThreadPoolExecutor(max_workers=burst) as executor:
+            futures = [executor.submit(FirstTokenMs, gateway) for _ in range(burst)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception:
+                    failures += 1
+        burst_seconds = time.perf_counter() - start
+        stats = gateway.stats()
+        gateway.close()
+
+    print("# LLM gateway against the mock server\n")
+    print("| Run | First token p50 | p95 | Connections opened |")
+    print("|---|---|---|---|")
+    print(f"| cold ({requests} requests) | {statistics.median(cold):.1f} ms | {Percentile(cold, 0.95):.1f} ms | {cold_connections} |")
+    print(f"| pooled ({requests} requests) | {statistics.median(pooled):.1f} ms | {Percentile(pooled, 0.95):.1f} ms | {pooled_connections} |")
+    print(f"\nBurst of {burst} with a cap of {concurrency} and {error_rate:.0%} injected errors: "
+          f"{burst - failures}/{burst} succeeded in {burst_seconds:.2f} s; gateway stats {stats}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30)
+    parser.add_argument("--burst", type=int, default=24)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    args = parser.parse_args()
+    Run(args.requests, args.burst, args.error_rate, args.concurrency)
@@ -0,0 +1,74 @@
+"""Index build and query time of Backend.Memory at a realistic history size.
+
+Run from the project root:
+    python -m Benchmarks.MemoryBenchmark --turns 100000
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+from Backend.Memory import ConversationMemory
+from Benchmarks.Common import Percentile
+
+Topics = [
+    "photosynthesis", "newton laws", "alonzo church", "lambda calculus", "black holes", "python decorators",
+    "stock market", "cricket world cup", "cybersecurity", "neural networks", "mahatma gandhi", "spotify playlists",
+    "weather forecast", "quantum computing", "french revolution", "linear algebra", "docker containers", "tea recipes",
+]
+Filler = (
+    "the a of to and in is that for it as with was on be by this are or from at an have not they which one had "
+    "but what all were when we there can more if out so said about up into them some could time only other new"
+).split()
+
+
+def SyntheticTurn(rng: random.Random):
+    topic = rng.choice(Topics)
+    user = f"tell me about {topic} " + " ".join(rng.choice(Filler) for _ in range(rng.randint(3, 10)))
+    assistant = f"{topic.capitalize()} is " + " ".join(rng.choice(Filler + topic.split()) for _ in range(rng.randint(20, 60)))
+    return user, assistant, None
+
+
+def RunBenchmark(turns: int, queries: int, batch_size: int = 64):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as directory:
+        memory = ConversationMemory(db_path=os.path.join(directory, "Memory.db"))
+
+        # Build the index the way the chat log writer feeds it: in write-behind batches
+        start = time.perf_counter()
+        for offset in range(0, turns, batch_size):
+            memory.add_turns([SyntheticTurn(rng) for _ in range(min(batch_size, turns - offset))])
+        build_seconds = time.perf_counter() - start
+
+        incremental = []
+        for _ in range(200):
+            turn = SyntheticTurn(rng)
+            start = time.perf_counter()
+            memory.add_turn(*turn)
+            incremental.append((time.perf_counter() - start) * 1000)
+
+        latencies = []
+        for _ in range(queries):
+            query = f"what do you remember about {rng.choice(Topics)}?"
+            start = time.perf_counter()
+            memory.retrieve(query, k=3)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        size_mb = os.path.getsize(os.path.join(directory, "Memory.db")) / (1024 * 1024)
+        memory.close()
+
+    print(f"Turns indexed:            {turns}")
+    print(f"Bulk build:               {build_seconds:.2f} s ({turns / build_seconds:,.0f} turns/s)")
+    print(f"Incremental add (p50):    {statistics.median(incremental):.3f} ms")
+    print(f"Query latency p50 / p95:  {statistics.median(latencies):.2f} ms / {Percentile(latencies, 0.95):.2f} ms")
+    print(f"Index size on disk:       {size_mb:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+    RunBenchmark(args.turns, args.queries)
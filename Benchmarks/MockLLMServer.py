@@ -0,0 +1,281 @@
+"""Local stand-in for the Cohere and Groq chat APIs, so benchmarks run offline and in CI.
+
+Cohere: POST /v1/chat streams newline-delimited JSON events in the same
+shape as Cohere's v1 chat stream (stream-start, text-generation chunks,
+stream-end with billed token counts), or a single JSON response when the
+request is not streamed. Replies come from a fixtures file of
+{"query", "labels"} lines when one is given, otherwise from the local
+classifier, so the server exercises the transport and parsing rather than
+judging the prompt.
+
+Groq: POST /openai/v1/chat/completions streams OpenAI-style server-sent
+events with a canned answer of a few sentences.
+
+Point the clients, or the LLM gateway, at it with
+    LLMGateway(groq_base_url=server.url, cohere_base_url=server.url)
+or set GroqBaseURL and CohereBaseURL in .env. Latency, chunking and a rate
+of 429/503 errors can be configured.
+
+Run standalone from the project root:
+    python -m Benchmarks.MockLLMServer --port 8999 --latency 0.4
+"""
+import sys
+import json
+import socket
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from Backend.ContextWindow import CountTokens
+from Backend.LocalDMM import LocalDMM, Normalize
+from Backend.Router import GetRouter, QueryCategories
+
+
+def LocalClassifier(query: str) -> List[str]:
+    labels, _ = LocalDMM(query)
+    if labels:
+        return labels
+    router = GetRouter()
+    if router.model is not None:
+        category, _ = router.model.predict(query)
+        if category in QueryCategories:
+            return [f"{category} {Normalize(query)}"]
+    return [f"general {Normalize(query)}"]
+
+
+def LoadResponses(path: str) -> Dict[str, List[str]]:
+    responses = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                example = json.loads(line)
+                responses[Normalize(example["query"])] = example["labels"]
+    return responses
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that cancel a stream hang up mid-response; that is expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockLLMServer:
+    """Threaded HTTP server answering chat requests; use as a context manager or start()/stop()."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.3, jitter: float = 0.1,
+                 chunk_delay: float = 0.005, error_rate: float = 0.0,
+                 responses: Optional[Dict[str, List[str]]] = None, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.responses = responses or {}
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+        # Messages of every Groq request, so callers can inspect the prompts they built
+        self.prompts: List[List[Dict]] = []
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._handler_class())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MockLLMServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def reply(self, message: str) -> str:
+        labels = self.responses.get(Normalize(message)) or LocalClassifier(message)
+        return ", ".join(labels)
+
+    def answer(self, question: str) -> str:
+        return (f"This is a mock answer to {question.strip()!r}. It is split into several sentences. "
+                f"Each one streams out a few characters at a time. That lets callers test streaming end to end.")
+
+    def _draw(self):
+        """Delay before the first token and whether this request fails."""
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return delay, failed, self.random.choice((429, 503))
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                # One handler per TCP connection, so this counts connections rather than requests
+                with server._lock:
+                    server.connections += 1
+                super().setup()
+                # Streamed events are small writes; without this Nagle's algorithm holds them for the client's ACK
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, payload: Dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _write_chunk(self, payload: Dict):
+                self._write_raw(json.dumps(payload) + "\n")
+
+            def do_HEAD(self):
+                # Connection pre-warming only needs a response
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"message": "invalid JSON body"})
+                    return
+                path = self.path.rstrip("/")
+                if path not in ("/v1/chat", "/openai/v1/chat/completions"):
+                    self._send_json(404, {"message": f"unknown path {self.path}"})
+                    return
+
+                delay, failed, status = server._draw()
+                time.sleep(delay)
+                if failed:
+                    self._send_json(status, {"message": "mock overload"})
+                    return
+
+                if path == "/v1/chat":
+                    self._cohere_chat(request)
+                else:
+                    self._groq_chat(request)
+
+            def _groq_chat(self, request: Dict):
+                with server._lock:
+                    server.prompts.append(list(request.get("messages") or []))
+                question = next((message["content"] for message in reversed(request.get("messages") or [])
+                                 if message.get("role") == "user"), "")
+                text = server.answer(question)
+                completion_id = f"chatcmpl-{uuid.uuid4()}"
+                created = int(time.time())
+                model = request.get("model", "mock")
+
+                def chunk(delta, finish_reason=None):
+                    return {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+
+                if not request.get("stream"):
+                    self._send_json(200, {
+                        "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                                     "finish_reason": "stop"}],
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                events = [chunk({"role": "assistant", "content": ""})]
+                events += [chunk({"content": text[index:index + 4]}) for index in range(0, len(text), 4)]
+                events.append(chunk({}, "stop"))
+                for event in events:
+                    time.sleep(server.chunk_delay)
+                    self._write_raw(f"data: {json.dumps(event)}\n\n")
+                self._write_raw("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+            def _write_raw(self, text: str):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _cohere_chat(self, request: Dict):
+                message = request.get("message", "")
+                text = server.reply(message)
+                prompt = " ".join([request.get("preamble") or "", message] + [
+                    turn.get("message", "") for turn in request.get("chat_history") or []
+                ])
+                generation_id = str(uuid.uuid4())
+                response = {
+                    "response_id": str(uuid.uuid4()),
+                    "text": text,
+                    "generation_id": generation_id,
+                    "finish_reason": "COMPLETE",
+                    "meta": {
+                        "api_version": {"version": "1"},
+                        "billed_units": {"input_tokens": CountTokens(prompt), "output_tokens": CountTokens(text)},
+                    },
+                }
+                if not request.get("stream"):
+                    self._send_json(200, response)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/stream+json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self._write_chunk({"is_finished": False, "event_type": "stream-start", "generation_id": generation_id})
+                for index in range(0, len(text), 4):
+                    time.sleep(server.chunk_delay)
+                    self._write_chunk({"is_finished": False, "event_type": "text-generation", "text": text[index:index + 4]})
+                self._write_chunk({"is_finished": True, "event_type": "stream-end", "finish_reason": "COMPLETE",
+                                   "response": response})
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8999)
+    parser.add_argument("--latency", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 429/503")
+    parser.add_argument("--responses", help="JSONL of {query, labels} to reply with")
+    args = parser.parse_args()
+
+    mock = MockLLMServer(port=args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                         responses=LoadResponses(args.responses) if args.responses else None)
+    print(f"Mock Cohere API listening on {mock.url}")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,92 @@
+"""Accuracy and latency of the local router against the Cohere decisions it learns from.
+
+Every logged decision is held out in turn (leave-one-out) and the model is
+retrained on the seed examples plus the remaining decisions. Cohere's latency
+is taken from the gap between "Processing query" and "Decision" in the log.
+The router is only consulted at runtime with RouterEnabled=True in .env,
+which is worth setting once its accuracy here is close to Cohere's.
+
+Run from the project root:
+    python -m Benchmarks.RouterEvaluation
+"""
+import re
+import time
+import argparse
+import statistics
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from Backend.Router import (
+    ASSISTANT_LOG_PATH, LabelCategory, LoadLoggedDecisions, Router, RouterModel, RouterThreshold,
+    TrainingExamples,
+)
+from Benchmarks.Common import Percentile
+
+LogLine = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - \w+ - (Processing query|Decision): ")
+
+
+def CohereLatencies(log_path: str = ASSISTANT_LOG_PATH):
+    latencies = []
+    started = None
+    with open(log_path, "r", encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            match = LogLine.match(line)
+            if not match:
+                continue
+            stamp = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S,%f")
+            if match.group(2) == "Processing query":
+                started = stamp
+            elif started is not None:
+                latencies.append((stamp - started).total_seconds() * 1000)
+                started = None
+    return latencies
+
+
+def Evaluate(threshold: float):
+    pairs = [(query, labels) for query, labels in LoadLoggedDecisions() if labels]
+    single = [(index, query, labels) for index, (query, labels) in enumerate(pairs)
+              if len({LabelCategory(label) for label in labels}) == 1]
+
+    correct = 0
+    routed = routed_correct = routed_exact = 0
+    latencies = []
+    confusion = defaultdict(Counter)
+    for index, query, labels in single:
+        expected = LabelCategory(labels[0])
+        model = RouterModel.train(TrainingExamples(pairs[:index] + pairs[index + 1:]))
+
+        start = time.perf_counter()
+        category, _ = model.predict(query)
+        decision = Router(model, threshold).route(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        confusion[expected][category] += 1
+        correct += category == expected
+        if decision is not None:
+            routed += 1
+            routed_correct += LabelCategory(decision[0]) == expected
+            routed_exact += decision == labels
+
+    cohere = CohereLatencies()
+    total = len(single) or 1
+    print("# Local router vs Cohere command-r-plus\n")
+    print(f"Logged decisions: {len(pairs)} ({len(single)} single-intent, evaluated leave-one-out)\n")
+    print("| Metric | Local router | Cohere |")
+    print("|---|---|---|")
+    print(f"| Category accuracy (all queries) | {correct / total:.1%} | reference |")
+    print(f"| Coverage at threshold {threshold:.2f} | {routed / total:.1%} | 100% |")
+    print(f"| Category accuracy when routed | {routed_correct / routed if routed else 0:.1%} | reference |")
+    print(f"| Exact label match when routed | {routed_exact / routed if routed else 0:.1%} | reference |")
+    print(f"| Latency p50 | {statistics.median(latencies):.3f} ms | {statistics.median(cohere) if cohere else float('nan'):.0f} ms |")
+    print(f"| Latency p95 | {Percentile(latencies, 0.95):.3f} ms | {Percentile(cohere, 0.95):.0f} ms |")
+
+    print("\nConfusion (expected -> predicted):")
+    for expected, predicted in sorted(confusion.items()):
+        print(f"  {expected:15} {dict(predicted)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threshold", type=float, default=RouterThreshold)
+    args = parser.parse_args()
+    Evaluate(args.threshold)
@@ -0,0 +1,144 @@
+"""Latency and context size of Backend.WebSearch.SearchStage against local HTML fixtures.
+
+The stand-in search backend answers from Benchmarks/Fixtures/Search/results.json
+and the pages are served from the same directory by an httpx mock transport,
+each after --latency seconds and in small chunks. eiffel-news.html is slowed
+to --slow seconds to show the per-fetch deadline, and one result is missing
+(404). Two runs of the same query:
+  sequential  the pages fetched one after another
+  concurrent  SearchStage.gather, all pages at once
+plus the token cost of the context compared with the old title-and-snippet block.
+
+Then the search backends on their own: the local BM25 index over the
+fixture directory, and HedgedSearch with the fixture backend slowed to
+--search-latency seconds and the local index as the hedge.
+
+Run from the project root:
+    python -m Benchmarks.SearchStageBenchmark [--latency 0.3] [--slow 5] [--search-latency 2] [--hedge-delay 0.3]
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+import httpx
+
+from Backend.ContextWindow import CountTokens
+from Backend.SearchBackend import HedgedSearch, LocalIndexBackend, SearchBackend
+from Backend.WebSearch import Passage, RankPassages, SearchResult, SearchStage, SplitPassages
+
+FIXTURES_PATH = os.path.join("Benchmarks", "Fixtures", "Search")
+CHUNK_SIZE = 512
+
+
+class FixtureSearch(SearchBackend):
+    """Search backend that answers from a results.json of query -> [{url, title, description}] after latency seconds."""
+
+    name = "fixture"
+
+    def __init__(self, directory: str = FIXTURES_PATH, latency: float = 0.0, timeout: float = 10):
+        super().__init__(timeout)
+        self.latency = latency
+        with open(os.path.join(directory, "results.json"), "r", encoding="utf-8") as f:
+            self.results: Dict[str, List[Dict]] = json.load(f)
+
+    def search(self, query: str, num_results: int) -> List[SearchResult]:
+        time.sleep(self.latency)
+        results = self.results.get(query.lower().strip(" ?"), [])
+        return [SearchResult(result["url"], result["title"], result["description"]) for result in results[:num_results]]
+
+
+def FixtureTransport(directory: str = FIXTURES_PATH, latency: float = 0.3,
+                     slow: Dict[str, float] = None) -> httpx.MockTransport:
+    """Serve directory's files by URL path, after latency seconds (or slow[name]), in CHUNK_SIZE chunks."""
+    slow = slow or {}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        name = os.path.basename(request.url.path)
+        path = os.path.join(directory, name)
+        delay = slow.get(name, latency)
+        await asyncio.sleep(delay / 2)
+        if not os.path.isfile(path):
+            return httpx.Response(404, text="not found")
+        with open(path, "rb") as f:
+            body = f.read()
+
+        async def chunks():
+            pieces = range(0, len(body), CHUNK_SIZE)
+            for start in pieces:
+                await asyncio.sleep(delay / 2 / len(pieces))
+                yield body[start:start + CHUNK_SIZE]
+
+        return httpx.Response(200, headers={"content-type": "text/html; charset=utf-8"}, content=chunks())
+
+    return httpx.MockTransport(handler)
+
+
+async def Sequential(stage: SearchStage, query: str):
+    results = stage.search(query, stage.num_results)
+    passages = []
+    async with httpx.AsyncClient(transport=stage.transport) as client:
+        for result in results:
+            paragraphs = await stage._fetch(client, result) or [result.description]
+            passages.extend(Passage(text, result.title, result.url) for text in SplitPassages(paragraphs))
+    return RankPassages(query, passages, stage.token_budget)
+
+
+def SnippetContext(results: List[SearchResult]) -> str:
+    return "".join(f"Title: {result.title}\nDescription: {result.description}\n\n" for result in results)
+
+
+def TimeSearch(backend: SearchBackend, query: str, runs: int = 5):
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        results = backend(query, 5)
+        seconds.append(time.perf_counter() - start)
+    return sorted(seconds)[len(seconds) // 2], results
+
+
+def Run(query: str, latency: float, slow: float, search_latency: float, hedge_delay: float):
+    search = FixtureSearch()
+    stage = SearchStage(search=search, fetch_timeout=2.0, deadline=3.0,
+                        transport=FixtureTransport(latency=latency, slow={"eiffel-news.html": slow}))
+
+    start = time.perf_counter()
+    sequential = asyncio.run(Sequential(stage, query))
+    sequential_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    passages = stage.gather(query)
+    concurrent_seconds = time.perf_counter() - start
+
+    context = stage.context(query)
+    print(f"# Search stage for {query!r} against local fixtures\n")
+    print("| Run | Seconds | Passages |")
+    print("|---|---|---|")
+    print(f"| sequential | {sequential_seconds:.2f} | {len(sequential)} |")
+    print(f"| concurrent | {concurrent_seconds:.2f} | {len(passages)} |")
+    print(f"\nContext tokens: {CountTokens(context)} (budget {stage.token_budget}); "
+          f"snippets alone: {CountTokens(SnippetContext(search(query, stage.num_results)))}\n")
+    for passage in passages:
+        print(f"- [{passage.title}] {passage.text[:100]}...")
+
+    local = LocalIndexBackend(FIXTURES_PATH)
+    hedged = HedgedSearch([FixtureSearch(latency=search_latency), local], hedge_delay=hedge_delay)
+    print("\n| Backend | Median seconds | Top result |")
+    print("|---|---|---|")
+    for name, backend in (("local index", local), (f"fixture ({search_latency:.1f} s) hedged with local", hedged)):
+        seconds, results = TimeSearch(backend, query)
+        print(f"| {name} | {seconds:.3f} | {results[0].title if results else '-'} |")
+    print(f"\nHedged stats: {hedged.stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--query", default="how tall is the eiffel tower")
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--slow", type=float, default=5.0)
+    parser.add_argument("--search-latency", type=float, default=2.0)
+    parser.add_argument("--hedge-delay", type=float, default=0.3)
+    args = parser.parse_args()
+    Run(args.query, args.latency, args.slow, args.search_latency, args.hedge_delay)
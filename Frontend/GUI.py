@@ -1,7 +1,8 @@
 from PyQt5.QtWidgets import QApplication, QMainWindow, QTextEdit, QStackedWidget, QWidget, QLineEdit, QGridLayout, QVBoxLayout, QHBoxLayout, QPushButton, QFrame, QLabel, QSizePolicy
-from PyQt5.QtGui import QIcon, QPainter, QMovie, QColor, QTextCharFormat, QPixmap, QFont, QTextBlockFormat
-from PyQt5.QtCore import Qt, QSize, QTimer
+from PyQt5.QtGui import QIcon, QPainter, QMovie, QColor, QTextCharFormat, QPixmap, QFont, QTextBlockFormat, QTextCursor
+from PyQt5.QtCore import Qt, QSize, QObject, QTimer, pyqtSignal
 from dotenv import dotenv_values
+from Backend.StateBus import bus, STATUS, MICROPHONE, RESPONSES, STREAMING
 import sys
 import os
 
@@ -11,6 +12,8 @@ current_dir = os.getcwd()
 old_chat_message = ""
 TempDirPath = rf"{current_dir}\Frontend\Files"
 GraphicsDirPath = rf"{current_dir}\Frontend\Graphics"
+# Streamed answers are redrawn at most this often (ms), however fast tokens arrive
+StreamRepaintInterval = 50
 
 def AnswerModifier(Answer):
     lines = Answer.split('\n')
@@ -35,20 +38,20 @@ def QueryModifier(Query):
     return new_query.capitalize()
 
 def SetMicrophoneStatus(Command):
-    with open(rf'{TempDirPath}\Mic.data', "w", encoding='utf-8') as file:
-        file.write(Command)
+    bus.set(MICROPHONE, Command)
 
 def GetMicrophoneStatusStatus():
-    with open(rf'{TempDirPath}\Mic.data', "r", encoding='utf-8') as file:
-        return file.read()
+    return bus.get(MICROPHONE)
+
+def WaitForMicrophoneStatus(Command, timeout=None):
+    # Blocks the calling thread until the mic button publishes Command
+    return bus.wait_for(MICROPHONE, lambda status: status == Command, timeout)
 
 def SetAssistantStatus(Status):
-    with open(rf'{TempDirPath}\Status.data', "w", encoding='utf-8') as file:
-        file.write(Status)
+    bus.set(STATUS, Status)
 
 def GetAssistantStatus():
-    with open(rf'{TempDirPath}\Status.data', "r", encoding='utf-8') as file:
-        return file.read()
+    return bus.get(STATUS)
 
 def MicButtonInitialed():
     SetMicrophoneStatus("False")
@@ -63,8 +66,35 @@ def TempDirectoryPath(Filename):
     return rf'{TempDirPath}\{Filename}'
 
 def ShowTextToScreen(Text):
-    with open(rf'{TempDirPath}\Responses.data', "w", encoding='utf-8') as file:
-        file.write(Text)
+    bus.set(RESPONSES, Text)
+
+def ShowStreamingText(Text):
+    # Partial answer; replaced by the final text when ShowTextToScreen is called
+    bus.set(STREAMING, Text)
+
+def EndStreamingText():
+    # Remove the partial answer, whether or not a final text follows
+    bus.set(STREAMING, "")
+
+class StateSignals(QObject):
+    # Re-emits state bus updates as Qt signals so widgets are updated on the GUI thread
+    statusChanged = pyqtSignal(str)
+    responsesChanged = pyqtSignal(str)
+    streamingChanged = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        bus.subscribe(STATUS, self.statusChanged.emit)
+        bus.subscribe(RESPONSES, self.responsesChanged.emit)
+        bus.subscribe(STREAMING, self.streamingChanged.emit)
+
+_state_signals = None
+
+def GetStateSignals():
+    global _state_signals
+    if _state_signals is None:
+        _state_signals = StateSignals()
+    return _state_signals
 
 class ChatSection(QWidget):
     def __init__(self):
@@ -106,10 +136,21 @@ class ChatSection(QWidget):
         font.setPointSize(13)
         self.chat_text_edit.setFont(font)
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.loadMessages)
-        self.timer.timeout.connect(self.SpeechRecogText)
-        self.timer.start(5)
+        # In-progress answer: where it starts in the document, what is drawn and what is waiting
+        self.stream_start = None
+        self.stream_rendered = ""
+        self.stream_pending = None
+        self.stream_timer = QTimer(self)
+        self.stream_timer.setSingleShot(True)
+        self.stream_timer.setInterval(StreamRepaintInterval)
+        self.stream_timer.timeout.connect(self.renderStream)
+
+        signals = GetStateSignals()
+        signals.responsesChanged.connect(self.loadMessages)
+        signals.streamingChanged.connect(self.updateStream)
+        signals.statusChanged.connect(self.SpeechRecogText)
+        self.loadMessages(bus.get(RESPONSES))
+        self.SpeechRecogText(GetAssistantStatus())
         self.chat_text_edit.viewport().installEventFilter(self)
 
         self.setStyleSheet("""
@@ -135,18 +176,66 @@ class ChatSection(QWidget):
             }
         """)
 
-    def loadMessages(self):
+    def loadMessages(self, messages):
         global old_chat_message
-        with open(TempDirectoryPath('Responses.data'), "r", encoding='utf-8') as file:
-            messages = file.read()
-            if messages and messages != old_chat_message:
-                self.addMessage(message=messages, color='White')
-                old_chat_message = messages
+        if messages and messages != old_chat_message:
+            # The final text replaces the streamed draft of the same answer
+            self.endStream()
+            self.addMessage(message=messages, color='White')
+            old_chat_message = messages
+
+    def updateStream(self, text):
+        if not text:
+            self.endStream()
+            return
+        # Tokens can arrive faster than the screen needs redrawing; keep only the latest text
+        self.stream_pending = text
+        if not self.stream_timer.isActive():
+            self.stream_timer.start()
+
+    def renderStream(self):
+        text, self.stream_pending = self.stream_pending, None
+        if not text:
+            return
+        # Cleaned up here, once per repaint, rather than by the producer on every token
+        text = AnswerModifier(text)
+        cursor = self.chat_text_edit.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        if self.stream_start is None:
+            format = QTextCharFormat()
+            format.setForeground(QColor('White'))
+            block_format = QTextBlockFormat()
+            block_format.setTopMargin(10)
+            block_format.setLeftMargin(10)
+            cursor.setBlockFormat(block_format)
+            cursor.setCharFormat(format)
+            self.stream_start = cursor.position()
+            self.stream_rendered = ""
+
+        if text.startswith(self.stream_rendered):
+            # Usual case: append only the new tokens
+            cursor.insertText(text[len(self.stream_rendered):])
+        else:
+            cursor.setPosition(self.stream_start, QTextCursor.KeepAnchor)
+            cursor.insertText(text)
+        self.stream_rendered = text
+        self.chat_text_edit.setTextCursor(cursor)
+
+    def endStream(self):
+        self.stream_timer.stop()
+        self.stream_pending = None
+        if self.stream_start is None:
+            return
+        cursor = self.chat_text_edit.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        cursor.setPosition(self.stream_start, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.chat_text_edit.setTextCursor(cursor)
+        self.stream_start = None
+        self.stream_rendered = ""
 
-    def SpeechRecogText(self):
-        with open(TempDirectoryPath('Status.data'), "r", encoding='utf-8') as file:
-            messages = file.read()
-            self.label.setText(messages)
+    def SpeechRecogText(self, messages):
+        self.label.setText(messages)
 
     def load_icon(self, path, width=60, height=60):
         pixmap = QPixmap(path)
@@ -216,14 +305,11 @@ class InitialScreen(QWidget):
         self.setFixedWidth(screen_width)
         self.setStyleSheet("background-color: black;")
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.SpeechRecogText)
-        self.timer.start(5)
+        GetStateSignals().statusChanged.connect(self.SpeechRecogText)
+        self.SpeechRecogText(GetAssistantStatus())
 
-    def SpeechRecogText(self):
-        with open(TempDirectoryPath('Status.data'), "r", encoding='utf-8') as file:
-            messages = file.read()
-            self.label.setText(messages)
+    def SpeechRecogText(self, messages):
+        self.label.setText(messages)
 
     def load_icon(self, path, width=60, height=60):
         pixmap = QPixmap(path)
@@ -2,19 +2,30 @@ from Frontend.GUI import (
     GraphicalUserInterface,
     SetAssistantStatus,
     ShowTextToScreen,
+    ShowStreamingText,
+    EndStreamingText,
     TempDirectoryPath,
     SetMicrophoneStatus,
     AnswerModifier,
     QueryModifier,
     GetMicrophoneStatusStatus,
-    GetAssistantStatus
+    GetAssistantStatus,
+    WaitForMicrophoneStatus
 )
-from Backend.Model import FirstLayerDMM
+from Backend.Model import FirstLayerDMMStream, engine as decision_engine
 from Backend.RealtimeSearchEngine import RealtimeSearchEngine
 from Backend.Automation import Automation
 from Backend.SpeechToText import SpeechRecognition
 from Backend.Chatbot import ChatBot
-from Backend.TextToSpeech import TextToSpeech
+from Backend.TextToSpeech import TextToSpeech, SpeechStream
+from Backend.ChatLogStore import GetChatLog
+from Backend.HistoryLookup import HistoryLookup
+from Backend.KnowledgeBase import KnowledgeAnswer
+from Backend.DecisionCache import CacheKey, GetDecisionCache
+from Backend.AnswerCache import GetAnswerCache
+from Backend.SearchCache import GetSearchCache
+from Backend.LLMGateway import GetGateway
+from Backend.Speculation import SpeculativeAnswer, SpeculativeAnswers, StartSpeculation, metrics as speculation_metrics
 from dotenv import dotenv_values
 from asyncio import run
 from time import sleep
@@ -27,6 +38,7 @@ from datetime import datetime
 from contextlib import contextmanager
 import queue
 import signal
+from concurrent.futures import ThreadPoolExecutor
 import sys
 from pathlib import Path
 from typing import Optional, List, Dict, Any
@@ -53,7 +65,9 @@ class VoiceAssistant:
         self.subprocesses = []
         self.is_running = True
         self.command_queue = queue.Queue()
+        self.task_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="AssistantTask")
         self.conversation_history = []
+        self.chat_log = GetChatLog()
         
         # Enhanced function list with categories
         self.functions = {
@@ -122,31 +136,20 @@ class VoiceAssistant:
     def show_default_chat_if_no_chats(self):
         """Initialize chat if no existing conversations."""
         try:
-            with self.safe_file_operation('Data/ChatLog.json', 'r') as file:
-                if file is None or len(file.read()) < 5:
-                    with self.safe_file_operation(TempDirectoryPath('Database.data'), 'w') as temp_file:
-                        if temp_file:
-                            temp_file.write("")
-                    
-                    with self.safe_file_operation(TempDirectoryPath('Responses.data'), 'w') as temp_file:
-                        if temp_file:
-                            temp_file.write(self.default_message)
+            if self.chat_log.count() == 0:
+                with self.safe_file_operation(TempDirectoryPath('Database.data'), 'w') as temp_file:
+                    if temp_file:
+                        temp_file.write("")
+                
+                ShowTextToScreen(self.default_message)
         except Exception as e:
             logger.error(f"Error in show_default_chat_if_no_chats: {e}")
     
     def read_chat_log_json(self) -> List[Dict]:
-        """Read chat log with enhanced error handling."""
+        """Read the most recent chat log entries."""
         try:
-            with self.safe_file_operation('Data/ChatLog.json', 'r') as file:
-                if file is None:
-                    return []
-                content = file.read()
-                if not content.strip():
-                    return []
-                return json.loads(content)
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON decode error in chat log: {e}")
-            return []
+            # Only the last 100 entries are shown on the GUI
+            return self.chat_log.tail(100)
         except Exception as e:
             logger.error(f"Error reading chat log: {e}")
             return []
@@ -154,22 +157,14 @@ class VoiceAssistant:
     def save_chat_log(self, role: str, content: str):
         """Save conversation to chat log."""
         try:
-            chat_entry = {
-                "role": role,
-                "content": content,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            chat_log = self.read_chat_log_json()
-            chat_log.append(chat_entry)
-            
-            # Keep only last 100 conversations to prevent file bloat
-            if len(chat_log) > 100:
-                chat_log = chat_log[-100:]
-            
-            with self.safe_file_operation('Data/ChatLog.json', 'w') as file:
-                if file:
-                    json.dump(chat_log, file, indent=2, ensure_ascii=False)
+            self.chat_log.append(role, content)
+        except Exception as e:
+            logger.error(f"Error saving chat log: {e}")
+    
+    def save_chat_turn(self, query: str, answer: str):
+        """Save a question and the answer given locally as one turn."""
+        try:
+            self.chat_log.extend([{"role": "user", "content": query}, {"role": "assistant", "content": answer}])
         except Exception as e:
             logger.error(f"Error saving chat log: {e}")
     
@@ -204,9 +199,7 @@ class VoiceAssistant:
                 lines = data.split('\n')
                 result = '\n'.join(lines)
                 
-                with self.safe_file_operation(TempDirectoryPath('Responses.data'), 'w') as file:
-                    if file:
-                        file.write(result)
+                ShowTextToScreen(result)
         except Exception as e:
             logger.error(f"Error showing chats on GUI: {e}")
     
@@ -214,6 +207,8 @@ class VoiceAssistant:
         """Initialize the assistant with enhanced setup."""
         try:
             logger.info("Initializing Voice Assistant...")
+            # Open connections to Groq and Cohere in the background so the first query skips TLS setup
+            GetGateway().prewarm()
             SetMicrophoneStatus("False")
             ShowTextToScreen("")
             self.show_default_chat_if_no_chats()
@@ -227,6 +222,7 @@ class VoiceAssistant:
     
     def process_query(self, query: str) -> bool:
         """Enhanced query processing with better error handling."""
+        speculation = None
         try:
             if not query or not query.strip():
                 logger.warning("Empty query received")
@@ -234,28 +230,68 @@ class VoiceAssistant:
             
             logger.info(f"Processing query: {query}")
             
-            # Save user query to chat log
-            self.save_chat_log("user", query)
-            
+            # Each turn is written to the chat log once, by whoever answers it: ChatBot and
+            # RealtimeSearchEngine record their own, the local handlers below record the rest
             ShowTextToScreen(f"{self.username}: {query}")
             SetAssistantStatus("Thinking...")
             
-            # Get decision from first layer
-            decision = FirstLayerDMM(query)
+            # Facts about the user are answered locally, before anything is sent to an API
+            if self._handle_knowledge_query(query):
+                return True
+            
+            # Optionally start answering as if the query were general while it is classified
+            speculation = StartSpeculation(QueryModifier(query))
+            
+            # Get decision from first layer, starting tasks while later labels are still streaming
+            decision = []
+            dispatched = []
+            for label in FirstLayerDMMStream(query):
+                decision.append(label)
+                if speculation is not None and (len(decision) > 1 or not label.startswith("general")):
+                    speculation.discard()
+                if self._dispatch_early(label):
+                    dispatched.append(label)
             logger.info(f"Decision: {decision}")
             
             if not decision:
                 logger.warning("No decision returned from FirstLayerDMM")
+                self.save_chat_log("user", query)
                 return False
             
-            return self._execute_decision(decision, query)
+            return self._execute_decision(decision, query, dispatched, speculation)
             
         except Exception as e:
             logger.error(f"Error processing query: {e}")
             SetAssistantStatus("Error processing request")
             return False
+        finally:
+            # No-op if the speculative answer was used
+            if speculation is not None:
+                speculation.discard()
     
-    def _execute_decision(self, decision: List[str], original_query: str) -> bool:
+    def _dispatch_early(self, label: str) -> bool:
+        """Start a task label as soon as it is decided; returns True if it was started."""
+        try:
+            if label.startswith(("general", "realtime")) or "exit" in label:
+                # Answers need the complete decision (queries may be merged), exit must run last
+                return False
+            
+            if "generate" in label:
+                self._handle_image_generation(label)
+                return True
+            
+            if any(label.startswith(func) for func_category in self.functions.values() for func in func_category):
+                logger.info(f"Dispatching task early: {label}")
+                self.task_executor.submit(self._handle_automation, [label])
+                return True
+            
+            return False
+        except Exception as e:
+            logger.error(f"Error dispatching task early: {e}")
+            return False
+    
+    def _execute_decision(self, decision: List[str], original_query: str, dispatched: Optional[List[str]] = None,
+                          speculation: Optional[SpeculativeAnswer] = None) -> bool:
         """Execute the decision with enhanced logic."""
         try:
             # Check for different types of queries
@@ -269,13 +305,20 @@ class VoiceAssistant:
             if exit_queries:
                 return self._handle_exit()
             
+            dispatched = dispatched or []
+            
             # Handle image generation
-            if generate_queries:
+            if generate_queries and generate_queries[0] not in dispatched:
                 self._handle_image_generation(generate_queries[0])
             
-            # Handle automation tasks
-            if task_queries:
-                self._handle_automation(decision)
+            # Handle automation tasks not already started while the decision streamed in
+            pending_tasks = [q for q in task_queries if q not in dispatched]
+            if pending_tasks:
+                self._handle_automation(pending_tasks if dispatched else decision)
+            
+            # Answer questions about earlier conversations from the local history index
+            if (general_queries or realtime_queries) and self._handle_history_lookup(original_query):
+                return True
             
             # Handle search and general queries
             if realtime_queries or (general_queries and realtime_queries):
@@ -286,11 +329,18 @@ class VoiceAssistant:
                 return self._handle_realtime_search(merged_query)
             
             elif general_queries:
-                return self._handle_general_query(general_queries[0])
+                # The speculative answer is only good for the question it was started with
+                query_final = general_queries[0].replace("general ", "", 1)
+                if speculation is not None and (speculation.discarded
+                                                or CacheKey(speculation.query) != CacheKey(query_final)):
+                    speculation = None
+                return self._handle_general_query(general_queries[0], speculation)
             
             elif realtime_queries:
                 return self._handle_realtime_search(realtime_queries[0].replace("realtime ", ""))
             
+            # Tasks only: nothing else records the request
+            self.save_chat_log("user", original_query)
             return False
             
         except Exception as e:
@@ -301,9 +351,9 @@ class VoiceAssistant:
         """Handle exit command gracefully."""
         try:
             farewell_message = "Goodbye! Have a great day!"
+            # ChatBot records the farewell itself
             answer = ChatBot(QueryModifier(farewell_message))
             self._display_and_speak_answer(answer)
-            self.save_chat_log("assistant", answer)
             
             # Graceful shutdown
             threading.Timer(2.0, self.shutdown).start()
@@ -345,22 +395,53 @@ class VoiceAssistant:
         """Handle realtime search queries."""
         try:
             SetAssistantStatus("Searching...")
-            answer = RealtimeSearchEngine(QueryModifier(query))
-            self._display_and_speak_answer(answer)
-            self.save_chat_log("assistant", answer)
+            self._stream_and_speak_answer(
+                lambda on_token: RealtimeSearchEngine(QueryModifier(query), on_token)
+            )
             return True
         except Exception as e:
             logger.error(f"Error in realtime search: {e}")
             return False
     
-    def _handle_general_query(self, query: str) -> bool:
-        """Handle general queries."""
+    def _handle_knowledge_query(self, query: str) -> bool:
+        """Answer from the local knowledge base; returns False if no stored fact matches."""
         try:
-            SetAssistantStatus("Thinking...")
-            query_final = query.replace("general ", "")
-            answer = ChatBot(QueryModifier(query_final))
+            answer = KnowledgeAnswer(query)
+            if answer is None:
+                return False
+            logger.info("Answered from the local knowledge base")
+            self._display_and_speak_answer(answer)
+            self.save_chat_turn(query, answer)
+            return True
+        except Exception as e:
+            logger.error(f"Error in knowledge lookup: {e}")
+            return False
+    
+    def _handle_history_lookup(self, query: str) -> bool:
+        """Answer history lookups locally; returns False if the query is not one or nothing matched."""
+        try:
+            answer = HistoryLookup(query)
+            if answer is None:
+                return False
+            logger.info("Answered from conversation history")
             self._display_and_speak_answer(answer)
-            self.save_chat_log("assistant", answer)
+            self.save_chat_turn(query, answer)
+            return True
+        except Exception as e:
+            logger.error(f"Error in history lookup: {e}")
+            return False
+    
+    def _handle_general_query(self, query: str, speculation: Optional[SpeculativeAnswer] = None) -> bool:
+        """Handle general queries, using the speculative answer if one was started."""
+        try:
+            SetAssistantStatus("Thinking...")
+            if speculation is not None:
+                self._stream_and_speak_answer(speculation.accept)
+            else:
+                query_final = query.replace("general ", "")
+                self._stream_and_speak_answer(
+                    lambda on_token: ChatBot(QueryModifier(query_final), on_token)
+                )
             return True
         except Exception as e:
             logger.error(f"Error in general query: {e}")
@@ -377,6 +458,37 @@ class VoiceAssistant:
         finally:
             SetAssistantStatus("Available...")
     
+    def _stream_and_speak_answer(self, generate) -> str:
+        """Run generate(on_token), drawing tokens and speaking sentences as they arrive, then show the answer."""
+        speech = SpeechStream(on_start=lambda: SetAssistantStatus("Speaking..."))
+        streamed = f"{self.assistant_name}: "
+        
+        def on_token(token: str):
+            nonlocal streamed
+            speech.feed(token)
+            # The GUI cleans up blank lines when it repaints, so each token only costs an append
+            streamed += token
+            ShowStreamingText(streamed)
+        
+        try:
+            answer = generate(on_token)
+        except Exception:
+            speech.stop()
+            raise
+        finally:
+            speech.close()
+            # Never leave the draft on screen, even when generate failed or the answer repeats the last one
+            EndStreamingText()
+        
+        try:
+            ShowTextToScreen(f"{self.assistant_name}: {answer}")
+            speech.wait()
+        except Exception as e:
+            logger.error(f"Error displaying/speaking answer: {e}")
+        finally:
+            SetAssistantStatus("Available...")
+        return answer
+    
     def main_execution(self) -> bool:
         """Main execution loop with enhanced error handling."""
         try:
@@ -404,10 +516,10 @@ class VoiceAssistant:
                     self.main_execution()
                 else:
                     ai_status = GetAssistantStatus()
-                    if "Available..." in ai_status:
-                        sleep(0.1)
-                    else:
+                    if "Available..." not in ai_status:
                         SetAssistantStatus("Available...")
+                    # Sleep until the mic button is toggled on instead of polling
+                    WaitForMicrophoneStatus("True")
             except Exception as e:
                 logger.error(f"Error in first thread: {e}")
                 sleep(1)  # Prevent rapid error loops
@@ -424,6 +536,7 @@ class VoiceAssistant:
         """Graceful shutdown of the assistant."""
         logger.info("Shutting down Voice Assistant...")
         self.is_running = False
+        self.task_executor.shutdown(wait=False)
         
         # Terminate all subprocesses
         for process in self.subprocesses:
@@ -435,6 +548,25 @@ class VoiceAssistant:
             except Exception as e:
                 logger.error(f"Error terminating subprocess: {e}")
         
+        # Make sure queued chat log writes reach disk
+        self.chat_log.flush(timeout=5)
+        
+        decision_cache = GetDecisionCache()
+        decision_cache.save()
+        logger.info(f"Decision cache stats: {decision_cache.stats()}")
+        logger.info(f"Decision engine stats: {decision_engine.stats()}")
+        answer_cache = GetAnswerCache()
+        answer_cache.save()
+        logger.info(f"Answer cache stats: {answer_cache.stats()}")
+        search_cache = GetSearchCache()
+        search_cache.save()
+        logger.info(f"Search cache stats: {search_cache.stats()}")
+        gateway = GetGateway()
+        logger.info(f"LLM gateway stats: {gateway.stats()}")
+        gateway.close()
+        if SpeculativeAnswers:
+            logger.info(f"Speculation stats: {speculation_metrics.stats()}")
+        
         SetAssistantStatus("Offline")
         logger.info("Voice Assistant shutdown complete")
     